@@ -7,22 +7,22 @@ from fastapi import Request, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from app.core.config import settings
-from app.core.db import get_db
+from app.core.db import get_db, get_async_db
 from app.core.security import decode_jwt_token, TokenType
-from app.schemas.users import DBUser, Role
-from app.crud.users import get_user_by_id_query
+from app.schemas.users import Role
+from app.crud import users as crud_users
+from app.crud.rows import UserRecord
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/signin")
 
 SessionDep = Annotated[Connection, Depends(get_db)]
+AsyncSessionDep = Annotated[Connection, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> DBUser:
+async def get_current_user(token: TokenDep) -> UserRecord:
     try:
-        payload = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_jwt_token(token)
         user_id = payload.get('sub')
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -32,21 +32,20 @@ def get_current_user(session: SessionDep, token: TokenDep) -> DBUser:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
-    cursor = session.execute(get_user_by_id_query, (user_id,))
-    user = cursor.fetchone()
+    user = await crud_users.get_cached_user_async(user_id)
 
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    return DBUser(**dict(user))
+    return user
 
 
-CurrentUser = Annotated[DBUser, Depends(get_current_user)]
+CurrentUser = Annotated[UserRecord, Depends(get_current_user)]
 
 
-def get_current_admin_user(current_user: CurrentUser) -> DBUser:
+async def get_current_admin_user(current_user: CurrentUser) -> UserRecord:
     if current_user.role != Role.admin.value:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -55,25 +54,37 @@ def get_current_admin_user(current_user: CurrentUser) -> DBUser:
     return current_user
 
 
-def get_user_from_refresh_token(request: Request) -> UUID:
+def get_refresh_token_payload(request: Request) -> dict:
     rt = request.cookies.get(TokenType.REFRESH_TOKEN.value)
 
     if not rt:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Missed refresh token'
         )
-    payload = decode_jwt_token(rt)
+    try:
+        payload = decode_jwt_token(rt)
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid refresh token'
+        )
 
     if payload.get('token_type') != TokenType.REFRESH_TOKEN.value:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid refresh token'
         )
 
-    user_id = payload.get('sub')
-
-    if not user_id:
+    if not payload.get('sub'):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token: no subject'
         )
+    if not payload.get('jti'):
+        # Issued before rotation; the user has to sign in again
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid refresh token'
+        )
 
-    return UUID(user_id)
+    return payload
+
+
+def get_user_from_refresh_token(request: Request) -> UUID:
+    return UUID(get_refresh_token_payload(request)['sub'])
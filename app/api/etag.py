@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Responses depend on the caller, and clients should revalidate before reuse
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over ``parts``, e.g. a table version and the query string."""
+    raw = '\x1f'.join(map(str, parts)).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, the W/ prefix is ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(',')
+    )
+
+
+def not_modified(
+    request: Request, response: Response, etag: str, vary: str | None = None
+) -> Response | None:
+    """Set ``etag`` on the response; return a 304 response when the client
+    already holds this version. ``vary`` names the request headers the
+    representation depends on."""
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if vary:
+        headers['Vary'] = vary
+    response.headers.update(headers)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -0,0 +1,197 @@
+import codecs
+import csv
+import json
+import logging
+from typing import AsyncIterator, Callable
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from app.core.db import pooled_connection
+from app.core.exceptions import ImportFormatError
+from app.core.writer import writer
+from app.crud import categories as crud_categories
+from app.crud import items as crud_items
+from app.crud import statuses as crud_statuses
+from app.schemas.items import CreateItem, ItemImportError, ItemImportResults
+
+logger = logging.getLogger(__name__)
+
+# Longest record accepted, so that a body without line breaks is not buffered
+MAX_RECORD_CHARS = 64 * 1024
+
+# A record is its first line number with either its fields or why it is invalid
+Record = tuple[int, dict | None, str | None]
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 body as it arrives, one line at a time, line breaks kept."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                yield line + '\n'
+            if len(pending) > MAX_RECORD_CHARS:
+                raise ImportFormatError('Line is too long')
+        pending += decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError('Body is not valid UTF-8') from None
+    if pending:
+        yield pending
+
+
+async def ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    number = 0
+    async for line in read_lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if not isinstance(fields, dict):
+            yield number, None, 'Expected a JSON object'
+            continue
+        yield number, fields, None
+
+
+async def csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Rows of a CSV body whose first row names the columns; empty cells are
+    treated as missing."""
+    header = None
+    record, start, number = '', 0, 0
+    async for line in read_lines(chunks):
+        number += 1
+        if not record:
+            start = number
+        record += line
+        # An odd number of quotes means a quoted cell goes on in the next line
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_CHARS:
+                raise ImportFormatError(f'Row at line {start} is too long')
+            continue
+
+        try:
+            values = next(csv.reader([record]), [])
+        except csv.Error as e:
+            yield start, None, f'Invalid CSV: {e}'
+            continue
+        finally:
+            record = ''
+
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield start, None, f'Expected {len(header)} columns, got {len(values)}'
+        else:
+            fields = {name: value for name, value in zip(header, values) if value}
+            yield start, fields, None
+
+    if record:
+        yield start, None, 'Unterminated quoted cell'
+
+
+IMPORT_FORMATS: dict[str, Callable[[AsyncIterator[bytes]], AsyncIterator[Record]]] = {
+    'application/x-ndjson': ndjson_records,
+    'application/jsonl': ndjson_records,
+    'text/csv': csv_records,
+}
+
+
+async def _create_item(fields: dict) -> CreateItem:
+    """Validate a row; ``category`` and ``status`` may name a reference by
+    title instead of ``category_id`` and ``status_id``."""
+    fields = dict(fields)
+    category = fields.pop('category', None)
+    if category is not None:
+        found = await crud_categories.get_category_by_title_async(str(category))
+        if not found:
+            raise ValueError('Category not found')
+        fields['category_id'] = found.category_id
+
+    status = fields.pop('status', None)
+    if status is not None:
+        found = await crud_statuses.get_status_by_title_async(str(status))
+        if not found:
+            raise ValueError('Status not found')
+        fields['status_id'] = found.status_id
+
+    try:
+        return CreateItem.model_validate(fields)
+    except ValidationError as e:
+        raise ValueError(
+            '; '.join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors()
+            )
+        ) from None
+
+
+async def import_items(
+    records: AsyncIterator[Record],
+    user_id: UUID,
+    batch_size: int,
+    max_errors: int,
+) -> ItemImportResults:
+    """Create items from ``records``, committing every ``batch_size`` valid rows.
+
+    Batches already committed stay when a later one fails. A pooled connection
+    is only checked out while a batch is written, not while the body arrives.
+    """
+    results = ItemImportResults()
+
+    def reject(line: int, detail: str) -> None:
+        results.failed += 1
+        if len(results.errors) < max_errors:
+            results.errors.append(ItemImportError(line=line, detail=detail))
+
+    async def flush(lines: list[int], items: list[CreateItem]) -> None:
+        if writer.running:
+            # The writer inserts on its own connection
+            problems = await crud_items.import_items_async(
+                user_id=user_id, items_create=items
+            )
+        else:
+            async with pooled_connection() as connection:
+                problems = await crud_items.import_items_async(
+                    user_id=user_id, items_create=items, connection=connection
+                )
+        for line, problem in zip(lines, problems):
+            if problem:
+                reject(line, problem)
+            else:
+                results.imported += 1
+        results.batches += 1
+        logger.info(
+            'Import for user %s: %d items imported, %d rows rejected',
+            user_id,
+            results.imported,
+            results.failed,
+        )
+
+    lines, items = [], []
+    async for line, fields, problem in records:
+        if problem is None:
+            try:
+                items.append(await _create_item(fields))
+                lines.append(line)
+            except ValueError as e:
+                problem = str(e)
+        if problem is not None:
+            reject(line, problem)
+            continue
+
+        if len(items) >= batch_size:
+            await flush(lines, items)
+            lines, items = [], []
+
+    if items:
+        await flush(lines, items)
+    return results
@@ -5,6 +5,7 @@ from app.api.routes import auth
 from app.api.routes import categories
 from app.api.routes import statuses
 from app.api.routes import items
+from app.api.routes import stats
 
 api_router = APIRouter()
 
@@ -13,3 +14,4 @@ api_router.include_router(auth.router)
 api_router.include_router(categories.router)
 api_router.include_router(statuses.router)
 api_router.include_router(items.router)
+api_router.include_router(stats.router)
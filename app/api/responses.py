@@ -0,0 +1,122 @@
+from typing import AsyncGenerator
+
+import anyio
+import msgpack
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+# Column names once, then one array of values per row
+COLUMNAR_JSON = 'application/vnd.columnar+json'
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+class ColumnarJSONResponse(ORJSONResponse):
+    media_type = COLUMNAR_JSON
+
+
+LIST_FORMATS: dict[str, type[Response]] = {
+    JSON: ORJSONResponse,
+    COLUMNAR_JSON: ColumnarJSONResponse,
+    MSGPACK: MsgPackResponse,
+    'application/x-msgpack': MsgPackResponse,
+}
+
+# OpenAPI entry of list routes, next to the JSON schema of their response_model
+LIST_RESPONSES = {200: {'content': {COLUMNAR_JSON: {}, MSGPACK: {}}}}
+
+
+def list_format(request: Request) -> str:
+    """Media type of a list response, the most preferred one of the Accept
+    header that is supported; JSON when there is none."""
+    accepted = []
+    for position, part in enumerate(request.headers.get('accept', '').split(',')):
+        media_type, *params = (value.strip() for value in part.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(accepted):
+        if media_type in LIST_FORMATS:
+            return media_type
+        if media_type in ('*/*', 'application/*'):
+            return JSON
+    return JSON
+
+
+def list_response(
+    media_type: str,
+    key: str,
+    rows: list[dict],
+    count: int,
+    next_cursor: str | None,
+    response: Response | None = None,
+) -> Response:
+    """A page of rows under ``key`` in ``media_type``, see ``list_format``.
+
+    The rows come from the database and already have the public shape, so
+    they skip the route's ``response_model``, which only documents the JSON
+    form. Headers set on the route's ``response`` are kept.
+    """
+    if media_type == COLUMNAR_JSON:
+        content = {
+            'columns': list(rows[0]) if rows else [],
+            key: [list(row.values()) for row in rows],
+            'count': count,
+            'next_cursor': next_cursor,
+        }
+    else:
+        content = {key: rows, 'count': count, 'next_cursor': next_cursor}
+
+    headers = dict(response.headers) if response is not None else {}
+    headers['vary'] = 'Accept'
+    return LIST_FORMATS[media_type](content, headers=headers)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Closes its body once streaming stops, also when the client went away
+    while the body waited at a ``yield``, instead of when it is collected."""
+
+    async def stream_response(self, send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+async def ndjson_response(batches: AsyncGenerator[list, None]) -> StreamingResponse:
+    """Stream batches of rows as newline-delimited JSON, one row per line.
+
+    The first batch is read before the response starts, so that errors such as
+    a pool timeout still get their own status code. ``batches`` is closed as
+    soon as the stream ends, which releases its pooled connection.
+    """
+    first = await anext(batches, None)
+
+    async def body():
+        try:
+            batch = first
+            while batch is not None:
+                yield b''.join(orjson.dumps(row) + b'\n' for row in batch)
+                batch = await anext(batches, None)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await batches.aclose()
+
+    return ClosingStreamingResponse(body(), media_type='application/x-ndjson')
@@ -1,22 +1,47 @@
 from datetime import timedelta
 from fastapi import APIRouter, Response, Request, HTTPException, status
 
+import jwt
+
 from app.crud import users as crud_users
+from app.crud import tokens as crud_tokens
 from app.api.dependencies import (
-    SessionDep,
-    get_user_from_refresh_token,
+    AsyncSessionDep,
+    get_refresh_token_payload,
 )
 from app.schemas.users import LoginUser
-from app.core.security import verify_password, create_jwt_token, TokenType
+from app.core.security import (
+    create_jwt_token,
+    decode_jwt_token,
+    password_hasher,
+    TokenType,
+)
 from app.core.config import settings
 
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 
+def set_refresh_cookie(response: Response, user_id) -> None:
+    refresh_token = create_jwt_token(
+        subject=user_id,
+        expire_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        token_type=TokenType.REFRESH_TOKEN,
+    )
+
+    response.set_cookie(
+        key=TokenType.REFRESH_TOKEN.value,
+        value=refresh_token,
+        httponly=True,
+        max_age=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
+        # path=f'{settings.API_V1_STR}/auth/refresh'  # ToDO Fix the problem with Path. This does not work
+        path='/',
+    )
+
+
 @router.post('/signin')
-def signin(response: Response, user_login: LoginUser, session: SessionDep):
-    user = crud_users.get_user_by_email(
+async def signin(response: Response, user_login: LoginUser, session: AsyncSessionDep):
+    user = await crud_users.get_user_by_email_async(
         email=user_login.email.lower().strip(), connection=session
     )
 
@@ -25,7 +50,7 @@ def signin(response: Response, user_login: LoginUser, session: SessionDep):
             status_code=status.HTTP_404_NOT_FOUND, detail='User not found'
         )
 
-    if not verify_password(user_login.password, user.hashed_password):
+    if not await password_hasher.verify(user_login.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid password or email'
         )
@@ -36,20 +61,7 @@ def signin(response: Response, user_login: LoginUser, session: SessionDep):
         token_type=TokenType.ACCESS_TOKEN,
     )
 
-    refresh_token = create_jwt_token(
-        subject=user.user_id,
-        expire_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
-        token_type=TokenType.REFRESH_TOKEN,
-    )
-
-    response.set_cookie(
-        key=TokenType.REFRESH_TOKEN.value,
-        value=refresh_token,
-        httponly=True,
-        max_age=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
-        # path=f'{settings.API_V1_STR}/auth/refresh'  # ToDO Fix the problem with Path. This does not work
-        path='/',
-    )
+    set_refresh_cookie(response, user.user_id)
 
     return {
         'access_token': access_token,
@@ -58,22 +70,41 @@ def signin(response: Response, user_login: LoginUser, session: SessionDep):
 
 
 @router.post('/refresh')
-def refresh_token(request: Request, session: SessionDep):
-    user_id = get_user_from_refresh_token(request)
+async def refresh_token(request: Request, response: Response, session: AsyncSessionDep):
+    payload = get_refresh_token_payload(request)
+    user_id = payload['sub']
+
+    if await crud_tokens.is_token_revoked_async(payload['jti'], connection=session):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token revoked'
+        )
 
-    db_user = crud_users.get_user_by_id(user_id, session)
+    db_user = await crud_users.get_user_by_id_async(user_id, connection=session)
 
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='User not found'
         )
 
+    # Rotation: every refresh token is accepted once. Losing this race means
+    # the token was used concurrently or revoked by another process
+    if not await crud_tokens.revoke_token_async(
+        payload['jti'], payload['exp'], connection=session
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token revoked'
+        )
+    if crud_tokens.revoked_tokens.prune_due():
+        await crud_tokens.prune_revoked_tokens_async(connection=session)
+
     access_token = create_jwt_token(
         subject=user_id,
         expire_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         token_type=TokenType.ACCESS_TOKEN,
     )
 
+    set_refresh_cookie(response, user_id)
+
     return {
         'access_token': access_token,
         'token_type': 'bearer',
@@ -81,6 +112,17 @@ def refresh_token(request: Request, session: SessionDep):
 
 
 @router.post('/signout')
-def logout(response: Response):
+async def logout(request: Request, response: Response, session: AsyncSessionDep):
+    rt = request.cookies.get(TokenType.REFRESH_TOKEN.value)
+    if rt:
+        try:
+            payload = decode_jwt_token(rt)
+        except jwt.InvalidTokenError:
+            payload = {}
+        if payload.get('jti'):
+            await crud_tokens.revoke_token_async(
+                payload['jti'], payload['exp'], connection=session
+            )
+
     response.delete_cookie(TokenType.REFRESH_TOKEN.value)
     return {"message": "Logged out"}
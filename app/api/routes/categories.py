@@ -1,31 +1,59 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response, status
 
 from app.crud import categories as crud_categories
-from app.api.dependencies import SessionDep, get_current_admin_user, get_current_user
+from app.api.etag import make_etag, not_modified
+from app.api.responses import LIST_RESPONSES, list_format, list_response
+from app.api.dependencies import (
+    AsyncSessionDep,
+    get_current_admin_user,
+    get_current_user,
+)
 from app.schemas.categories import (
     UpdateCategory,
     CreateCategory,
     PublicCategory,
     PublicCategories,
 )
-from app.core.exceptions import DuplicateError, CreationError
+from app.core.exceptions import DuplicateError, CreationError, InvalidCursorError
 
 
 router = APIRouter(prefix='/categories', tags=['categories'])
 
 
 @router.get(
-    '/', response_model=PublicCategories, dependencies=[Depends(get_current_user)]
+    '/',
+    response_model=PublicCategories,
+    dependencies=[Depends(get_current_user)],
+    responses=LIST_RESPONSES,
 )
-def read_categories(session: SessionDep, offset: int = 0, limit: int = 100):
+async def read_categories(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
     """
     Retrieve categories.
     """
-    categories = crud_categories.get_categories(session, limit, offset)
-    total_categories = len(categories)
+    media_type = list_format(request)
+    digest = await crud_categories.get_categories_digest_async()
+    etag = make_etag('categories', digest, media_type, request.url.query)
+    cached = not_modified(request, response, etag, vary='Accept')
+    if cached is not None:
+        return cached
+
+    try:
+        categories, next_cursor = await crud_categories.get_categories_async(
+            limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    total_categories = await crud_categories.count_categories_async()
 
-    return PublicCategories(categories=categories, count=total_categories)
+    return list_response(
+        media_type, 'categories', categories, total_categories, next_cursor, response
+    )
 
 
 @router.get(
@@ -33,13 +61,16 @@ def read_categories(session: SessionDep, offset: int = 0, limit: int = 100):
     response_model=PublicCategory,
     dependencies=[Depends(get_current_user)],
 )
-def read_category_by_id(category_id: UUID, session: SessionDep):
+async def read_category_by_id(category_id: UUID, request: Request, response: Response):
     """
     Get a specific category by id.
     """
-    category = crud_categories.get_category_by_id(
-        category_id=category_id, connection=session
-    )
+    digest = await crud_categories.get_categories_digest_async()
+    cached = not_modified(request, response, make_etag('category', category_id, digest))
+    if cached is not None:
+        return cached
+
+    category = await crud_categories.get_category_by_id_async(category_id=category_id)
 
     if not category:
         raise HTTPException(
@@ -52,12 +83,12 @@ def read_category_by_id(category_id: UUID, session: SessionDep):
 @router.post(
     '/', dependencies=[Depends(get_current_admin_user)], response_model=PublicCategory
 )
-def create_category(*, session: SessionDep, category_create: CreateCategory):
+async def create_category(*, session: AsyncSessionDep, category_create: CreateCategory):
     """
     Create new category.
     """
     try:
-        category = crud_categories.create_category(
+        category = await crud_categories.create_category_async(
             category_create=category_create, connection=session
         )
 
@@ -76,13 +107,13 @@ def create_category(*, session: SessionDep, category_create: CreateCategory):
     dependencies=[Depends(get_current_admin_user)],
     response_model=PublicCategory,
 )
-def update_category(
-    *, category_id: UUID, category_update: UpdateCategory, session: SessionDep
+async def update_category(
+    *, category_id: UUID, category_update: UpdateCategory, session: AsyncSessionDep
 ):
     """
     Update category.
     """
-    db_category = crud_categories.get_category_by_id(
+    db_category = await crud_categories.get_category_by_id_async(
         category_id=category_id, connection=session
     )
 
@@ -91,8 +122,8 @@ def update_category(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='The category with this id does not exist in the system',
         )
-    if db_category.title is not None:
-        existing_category = crud_categories.get_category_by_title(
+    if category_update.title is not None:
+        existing_category = await crud_categories.get_category_by_title_async(
             title=category_update.title, connection=session
         )
 
@@ -102,7 +133,7 @@ def update_category(
                 detail='Category with this title already exists',
             )
 
-    db_category = crud_categories.update_category(
+    db_category = await crud_categories.update_category_async(
         category_id=category_id, category_update=category_update, connection=session
     )
 
@@ -113,14 +144,14 @@ def update_category(
     '/{category_id}',
     dependencies=[Depends(get_current_admin_user)],
 )
-def delete_category(
+async def delete_category(
     category_id: UUID,
-    session: SessionDep,
+    session: AsyncSessionDep,
 ) -> dict:
     """
     Delete a category.
     """
-    category = crud_categories.get_category_by_id(
+    category = await crud_categories.get_category_by_id_async(
         category_id=category_id, connection=session
     )
 
@@ -129,7 +160,7 @@ def delete_category(
             status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
         )
 
-    is_deleted = crud_categories.delete_category(
+    is_deleted = await crud_categories.delete_category_async(
         category_id=category_id, connection=session
     )
 
@@ -1,71 +1,242 @@
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, status
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.crud import items as crud_items
+from app.api import imports
+from app.api.etag import make_etag, not_modified
+from app.api.responses import (
+    LIST_RESPONSES,
+    list_format,
+    list_response,
+    ndjson_response,
+)
 from app.api.dependencies import (
     CurrentUser,
-    SessionDep,
+    AsyncSessionDep,
 )
 from app.schemas.items import (
     UpdateItem,
     PublicItem,
     PublicItems,
     CreateItem,
+    ItemFilters,
+    BulkCreateItems,
+    BulkUpdateItems,
+    BulkDeleteItems,
+    BulkItemResults,
+    ItemImportResults,
 )
 from app.schemas.users import Role
-from app.core.exceptions import CreationError
+from app.core.config import settings
+from app.core.db import stream_from_db
+from app.core.exceptions import CreationError, ImportFormatError, InvalidCursorError
 
 router = APIRouter(prefix='/items', tags=['items'])
 
 
-@router.get('/', response_model=PublicItems)
-def read_items(
-    session: SessionDep, current_user: CurrentUser, offset: int = 0, limit: int = 100
+@router.get('/', response_model=PublicItems, responses=LIST_RESPONSES)
+async def read_items(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    filters: Annotated[ItemFilters, Depends()],
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
 ):
     """
     Retrieve to-do items.
     """
+    user_id = None if current_user.role == Role.admin.value else current_user.user_id
+
+    version = await crud_items.get_items_version_async(
+        connection=session, user_id=user_id
+    )
+    media_type = list_format(request)
+    etag = make_etag('items', user_id or '', version, media_type, request.url.query)
+    cached = not_modified(request, response, etag, vary='Accept')
+    if cached is not None:
+        return cached
+
+    try:
+        items, next_cursor = await crud_items.get_items_async(
+            connection=session,
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            filters=filters,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    total_items = await crud_items.count_items_async(
+        connection=session, user_id=user_id, filters=filters
+    )
+
+    return list_response(media_type, 'items', items, total_items, next_cursor, response)
+
+
+@router.get('/search', response_model=PublicItems, responses=LIST_RESPONSES)
+async def search_items(
+    request: Request,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Full-text search over item titles and descriptions, best matches first.
+    """
+    user_id = None if current_user.role == Role.admin.value else current_user.user_id
 
-    if current_user.role == Role.admin.value:
-        items = crud_items.get_items(
-            connection=session, limit=limit, offset=offset, user_id=None
+    try:
+        items, next_cursor = await crud_items.search_items_async(
+            connection=session, q=q, limit=limit, cursor=cursor, user_id=user_id
         )
-    else:
-        items = crud_items.get_items(
-            connection=session, limit=limit, offset=offset, user_id=current_user.user_id
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    total_items = await crud_items.count_search_items_async(
+        connection=session, q=q, user_id=user_id
+    )
+
+    return list_response(list_format(request), 'items', items, total_items, next_cursor)
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_items(current_user: CurrentUser):
+    """
+    Stream the caller's items (admins: all items) as NDJSON, oldest first.
+    """
+    user_id = None if current_user.role == Role.admin.value else current_user.user_id
+
+    return await ndjson_response(
+        stream_from_db(
+            crud_items.export_items,
+            user_id=user_id,
+            batch_size=settings.DB_EXPORT_BATCH_SIZE,
         )
+    )
+
 
-    total_items = len(items)
+@router.post('/import', response_model=ItemImportResults)
+async def import_items(request: Request, current_user: CurrentUser):
+    """
+    Import items from an NDJSON (application/x-ndjson) or CSV (text/csv) body.
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+    parse = imports.IMPORT_FORMATS.get(content_type.lower())
+    if parse is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Send application/x-ndjson or text/csv',
+        )
 
-    return PublicItems(items=items, count=total_items)
+    try:
+        return await imports.import_items(
+            parse(request.stream()),
+            user_id=current_user.user_id,
+            batch_size=settings.DB_IMPORT_BATCH_SIZE,
+            max_errors=settings.IMPORT_MAX_ERRORS,
+        )
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+
+@router.post('/bulk', response_model=BulkItemResults)
+async def create_items(
+    *, session: AsyncSessionDep, current_user: CurrentUser, items_in: BulkCreateItems
+):
+    """
+    Create many items in one transaction.
+    """
+    return await crud_items.create_items_async(
+        user_id=current_user.user_id, items_create=items_in.items, connection=session
+    )
+
+
+@router.patch('/bulk', response_model=BulkItemResults)
+async def update_items(
+    *, session: AsyncSessionDep, current_user: CurrentUser, items_in: BulkUpdateItems
+):
+    """
+    Update many items in one transaction.
+    """
+    user_id = None if current_user.role == Role.admin.value else current_user.user_id
+
+    return await crud_items.update_items_async(
+        items_update=items_in.items, connection=session, user_id=user_id
+    )
+
+
+@router.delete('/bulk', response_model=BulkItemResults)
+async def delete_items(
+    *, session: AsyncSessionDep, current_user: CurrentUser, items_in: BulkDeleteItems
+):
+    """
+    Delete many items in one transaction.
+    """
+    user_id = None if current_user.role == Role.admin.value else current_user.user_id
+
+    return await crud_items.delete_items_async(
+        item_ids=items_in.item_ids, connection=session, user_id=user_id
+    )
 
 
 @router.get('/{item_id}', response_model=PublicItem)
-def read_item_by_id(item_id: UUID, session: SessionDep, current_user: CurrentUser):
+async def read_item_by_id(
+    item_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+):
     """
     Get a specific item by id.
     """
-    item = crud_items.get_item_by_id(item_id=item_id, connection=session)
+    # The owner and their change counter are enough to check permissions and
+    # answer a conditional request, the item is only read when it is sent
+    item_version = await crud_items.get_item_version_async(
+        item_id=item_id, connection=session, user_id=current_user.user_id
+    )
 
-    if not item:
+    if not item_version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Item not found"
         )
-    if not current_user.role == Role.admin.value and (item.user_id != current_user.id):
+    owner_id, version = item_version
+    if current_user.role != Role.admin.value and owner_id != current_user.user_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough permissions"
         )
 
+    cached = not_modified(request, response, make_etag('item', item_id, version))
+    if cached is not None:
+        return cached
+
+    item = await crud_items.get_item_by_id_async(
+        item_id=item_id, connection=session, user_id=owner_id
+    )
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Item not found"
+        )
+
     return item
 
 
 @router.post('/', response_model=PublicItem)
-def create_item(*, session: SessionDep, current_user: CurrentUser, item_in: CreateItem):
+async def create_item(
+    *, session: AsyncSessionDep, current_user: CurrentUser, item_in: CreateItem
+):
     """
     Create new item.
     """
     try:
-        item = crud_items.create_item(
+        item = await crud_items.create_item_async(
             user_id=current_user.user_id, item_create=item_in, connection=session
         )
         return item
@@ -77,17 +248,19 @@ def create_item(*, session: SessionDep, current_user: CurrentUser, item_in: Crea
 
 
 @router.patch('/{item_id}', response_model=PublicItem)
-def update_item(
+async def update_item(
     *,
     item_id: UUID,
     item_update: UpdateItem,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
 ):
     """
     Update item.
     """
-    db_item = crud_items.get_item_by_id(item_id, session)
+    db_item = await crud_items.get_item_by_id_async(
+        item_id, connection=session, user_id=current_user.user_id
+    )
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,14 +268,17 @@ def update_item(
         )
 
     if current_user.role != Role.admin.value and (
-        current_user.user_id != db_item.user_id
+        current_user.user_id != str(db_item.user_id)
     ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
 
-    updated_item = crud_items.update_item(
-        item_id=item_id, item_update=item_update, connection=session
+    updated_item = await crud_items.update_item_async(
+        item_id=item_id,
+        item_update=item_update,
+        connection=session,
+        user_id=db_item.user_id,
     )
 
     return updated_item
@@ -111,21 +287,29 @@ def update_item(
 @router.delete(
     '/{item_id}',
 )
-def delete_user(item_id: UUID, session: SessionDep, current_user: CurrentUser) -> dict:
+async def delete_user(
+    item_id: UUID, session: AsyncSessionDep, current_user: CurrentUser
+) -> dict:
     """
     Delete item.
     """
-    item = crud_items.get_item_by_id(item_id, session)
+    item = await crud_items.get_item_by_id_async(
+        item_id, connection=session, user_id=current_user.user_id
+    )
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Item not found"
         )
-    if current_user.role != Role.admin.value and (current_user.user_id != item.user_id):
+    if current_user.role != Role.admin.value and (
+        current_user.user_id != str(item.user_id)
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
 
-    is_deleted = crud_items.delete_item(item_id=item_id, connection=session)
+    is_deleted = await crud_items.delete_item_async(
+        item_id=item_id, connection=session, user_id=item.user_id
+    )
 
     if not is_deleted:
         raise HTTPException(
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import AsyncSessionDep, get_current_admin_user
+from app.core.cache import cache_stats
+from app.core.db import pool, run_in_db_executor
+from app.core.security import password_hasher
+from app.core.tracing import query_stats, explain_queries, find_full_scans
+from app.core.writer import writer
+from app.crud.tokens import revoked_tokens
+
+
+router = APIRouter(
+    prefix='/stats', tags=['stats'], dependencies=[Depends(get_current_admin_user)]
+)
+
+
+@router.get('/db')
+async def read_db_stats() -> dict:
+    """
+    Connection pool, writer, cache, password hashing and per-query statistics.
+    """
+    return {
+        'pool': pool.stats(),
+        'writer': writer.stats(),
+        'caches': cache_stats(),
+        'password_hasher': password_hasher.stats(),
+        'revoked_tokens': revoked_tokens.stats(),
+        'queries': query_stats.snapshot(),
+    }
+
+
+@router.get('/query-plans')
+async def read_query_plans(session: AsyncSessionDep) -> dict:
+    """
+    Query plans of the registered queries and the ones doing full table scans.
+    """
+    plans = await run_in_db_executor(explain_queries, session)
+    full_scans = await run_in_db_executor(find_full_scans, session)
+    return {'plans': plans, 'full_scans': full_scans}
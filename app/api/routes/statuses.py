@@ -1,8 +1,14 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response, status
 
 from app.crud import statuses as crud_statuses
-from app.api.dependencies import SessionDep, get_current_admin_user, get_current_user
+from app.api.etag import make_etag, not_modified
+from app.api.responses import LIST_RESPONSES, list_format, list_response
+from app.api.dependencies import (
+    AsyncSessionDep,
+    get_current_admin_user,
+    get_current_user,
+)
 from app.schemas.statuses import (
     UpdateStatus,
     CreateStatus,
@@ -10,23 +16,45 @@ from app.schemas.statuses import (
     PublicStatuses,
 )
 
-from app.core.exceptions import DuplicateError, CreationError
+from app.core.exceptions import DuplicateError, CreationError, InvalidCursorError
 
 
 router = APIRouter(prefix='/statuses', tags=['statuses'])
 
 
 @router.get(
-    '/', response_model=PublicStatuses, dependencies=[Depends(get_current_user)]
+    '/',
+    response_model=PublicStatuses,
+    dependencies=[Depends(get_current_user)],
+    responses=LIST_RESPONSES,
 )
-def read_statuses(session: SessionDep, offset: int = 0, limit: int = 100):
+async def read_statuses(
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
     """
     Retrieve statuses.
     """
-    statuses = crud_statuses.get_statuses(session, limit, offset)
-    total_statuses = len(statuses)
+    media_type = list_format(request)
+    digest = await crud_statuses.get_statuses_digest_async()
+    etag = make_etag('statuses', digest, media_type, request.url.query)
+    cached = not_modified(request, response, etag, vary='Accept')
+    if cached is not None:
+        return cached
 
-    return PublicStatuses(statuses=statuses, count=total_statuses)
+    try:
+        statuses, next_cursor = await crud_statuses.get_statuses_async(
+            limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    total_statuses = await crud_statuses.count_statuses_async()
+
+    return list_response(
+        media_type, 'statuses', statuses, total_statuses, next_cursor, response
+    )
 
 
 @router.get(
@@ -34,11 +62,16 @@ def read_statuses(session: SessionDep, offset: int = 0, limit: int = 100):
     response_model=PublicStatus,
     dependencies=[Depends(get_current_user)],
 )
-def read_status_by_id(status_id: UUID, session: SessionDep):
+async def read_status_by_id(status_id: UUID, request: Request, response: Response):
     """
     Get a specific status by id.
     """
-    status_item = crud_statuses.get_status_by_id(status_id, session)
+    digest = await crud_statuses.get_statuses_digest_async()
+    cached = not_modified(request, response, make_etag('status', status_id, digest))
+    if cached is not None:
+        return cached
+
+    status_item = await crud_statuses.get_status_by_id_async(status_id)
 
     if not status_item:
         raise HTTPException(
@@ -51,12 +84,14 @@ def read_status_by_id(status_id: UUID, session: SessionDep):
 @router.post(
     '/', dependencies=[Depends(get_current_admin_user)], response_model=PublicStatus
 )
-def create_status(*, session: SessionDep, status_create: CreateStatus):
+async def create_status(*, session: AsyncSessionDep, status_create: CreateStatus):
     """
     Create new status.
     """
     try:
-        status_item = crud_statuses.create_status(status_create, session)
+        status_item = await crud_statuses.create_status_async(
+            status_create, connection=session
+        )
         return PublicStatus(status_id=status_item.status_id, title=status_item.title)
 
     except DuplicateError as e:
@@ -72,19 +107,23 @@ def create_status(*, session: SessionDep, status_create: CreateStatus):
     dependencies=[Depends(get_current_admin_user)],
     response_model=PublicStatus,
 )
-def update_status(*, status_id: UUID, status_update: UpdateStatus, session: SessionDep):
+async def update_status(
+    *, status_id: UUID, status_update: UpdateStatus, session: AsyncSessionDep
+):
     """
     Update status.
     """
-    db_status = crud_statuses.get_status_by_id(status_id, session)
+    db_status = await crud_statuses.get_status_by_id_async(
+        status_id, connection=session
+    )
     if not db_status:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='The status with this id does not exist in the system',
         )
-    if db_status.title is not None:
-        existing_status = crud_statuses.get_status_by_title(
-            status_update.title, session
+    if status_update.title is not None:
+        existing_status = await crud_statuses.get_status_by_title_async(
+            status_update.title, connection=session
         )
 
         if existing_status and existing_status.status_id != status_id:
@@ -93,7 +132,9 @@ def update_status(*, status_id: UUID, status_update: UpdateStatus, session: Sess
                 detail='Status with this title already exists',
             )
 
-    db_status = crud_statuses.update_status(status_id, status_update, session)
+    db_status = await crud_statuses.update_status_async(
+        status_id, status_update, connection=session
+    )
     return db_status
 
 
@@ -101,20 +142,22 @@ def update_status(*, status_id: UUID, status_update: UpdateStatus, session: Sess
     '/{status_id}',
     dependencies=[Depends(get_current_admin_user)],
 )
-def delete_status(
+async def delete_status(
     status_id: UUID,
-    session: SessionDep,
+    session: AsyncSessionDep,
 ) -> dict:
     """
     Delete a status.
     """
-    status_item = crud_statuses.get_status_by_id(status_id, session)
+    status_item = await crud_statuses.get_status_by_id_async(
+        status_id, connection=session
+    )
     if not status_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Status not found"
         )
 
-    is_deleted = crud_statuses.delete_status(status_id, session)
+    is_deleted = await crud_statuses.delete_status_async(status_id, connection=session)
     if not is_deleted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,39 +1,77 @@
 from uuid import UUID
 from datetime import timedelta
-from fastapi import APIRouter, Response, Depends, HTTPException, status
+from fastapi import APIRouter, Query, Request, Response, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from app.crud import users as crud_users
+from app.api.responses import (
+    LIST_RESPONSES,
+    list_format,
+    list_response,
+    ndjson_response,
+)
+from app.crud import counters as crud_counters
 from app.api.dependencies import (
     CurrentUser,
-    SessionDep,
+    AsyncSessionDep,
     get_current_admin_user,
     get_current_user,
 )
 from app.schemas.users import PublicUsers, PublicUser, CreateUser, UpdateUser, Role
 
-from app.core.exceptions import DuplicateError, CreationError
-from app.core.security import create_jwt_token, TokenType
+from app.core.exceptions import DuplicateError, CreationError, InvalidCursorError
+from app.core.security import create_jwt_token, password_hasher, TokenType
 from app.core.config import settings
+from app.core.db import stream_from_db
 
 router = APIRouter(prefix='/users', tags=['users'])
 
 
 @router.get(
-    '/', dependencies=[Depends(get_current_admin_user)], response_model=PublicUsers
+    '/',
+    dependencies=[Depends(get_current_admin_user)],
+    response_model=PublicUsers,
+    responses=LIST_RESPONSES,
 )
-def read_users(session: SessionDep, offset: int = 0, limit: int = 100):
+async def read_users(
+    request: Request,
+    session: AsyncSessionDep,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
     """
     Retrieve users.
     """
-    users = crud_users.get_users(connection=session, limit=limit, offset=offset)
+    try:
+        users, next_cursor = await crud_users.get_users_async(
+            connection=session, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
 
-    total_users = len(users)
+    total_users = await crud_counters.get_counter_async('users', connection=session)
 
-    return PublicUsers(users=users, count=total_users)
+    return list_response(list_format(request), 'users', users, total_users, next_cursor)
+
+
+@router.get(
+    '/export',
+    dependencies=[Depends(get_current_admin_user)],
+    response_class=StreamingResponse,
+)
+async def export_users():
+    """
+    Stream all users as NDJSON, ordered by id.
+    """
+    return await ndjson_response(
+        stream_from_db(
+            crud_users.export_users, batch_size=settings.DB_EXPORT_BATCH_SIZE
+        )
+    )
 
 
 @router.get('/me', response_model=PublicUser)
-def read_user_me(current_user: CurrentUser):
+async def read_user_me(current_user: CurrentUser):
     """
     Get current user.
     """
@@ -41,11 +79,13 @@ def read_user_me(current_user: CurrentUser):
 
 
 @router.get('/{user_id}', response_model=PublicUser)
-def read_user_by_id(user_id: UUID, session: SessionDep, current_user: CurrentUser):
+async def read_user_by_id(
+    user_id: UUID, session: AsyncSessionDep, current_user: CurrentUser
+):
     """
     Get a specific user by id.
     """
-    user = crud_users.get_user_by_id(user_id=user_id, connection=session)
+    user = await crud_users.get_user_by_id_async(user_id=user_id, connection=session)
 
     if user == current_user:
         return user
@@ -60,11 +100,11 @@ def read_user_by_id(user_id: UUID, session: SessionDep, current_user: CurrentUse
 @router.post(
     '/', dependencies=[Depends(get_current_admin_user)], response_model=PublicUser
 )
-def create_user(*, session: SessionDep, user_in: CreateUser):
+async def create_user(*, session: AsyncSessionDep, user_in: CreateUser):
     """
     Create new user (role defaults to 'user').
     """
-    user = crud_users.get_user_by_email(user_in.email, session)
+    user = await crud_users.get_user_by_email_async(user_in.email, connection=session)
 
     if user:
         raise HTTPException(
@@ -72,7 +112,11 @@ def create_user(*, session: SessionDep, user_in: CreateUser):
             detail="The user with this email already exists in the system.",
         )
     try:
-        user = crud_users.create_user(user_create=user_in, connection=session)
+        user = await crud_users.create_user_async(
+            user_create=user_in,
+            connection=session,
+            hashed_password=await password_hasher.hash(user_in.password),
+        )
 
         return user
 
@@ -85,11 +129,15 @@ def create_user(*, session: SessionDep, user_in: CreateUser):
 
 
 @router.post('/signup')
-def register_user(response: Response, session: SessionDep, user_in: CreateUser):
+async def register_user(
+    response: Response, session: AsyncSessionDep, user_in: CreateUser
+):
     """
     Create new user without the need to be logged in.
     """
-    user = crud_users.get_user_by_email(email=user_in.email, connection=session)
+    user = await crud_users.get_user_by_email_async(
+        email=user_in.email, connection=session
+    )
 
     if user:
         raise HTTPException(
@@ -97,7 +145,11 @@ def register_user(response: Response, session: SessionDep, user_in: CreateUser):
             detail="The user with this email already exists in the system.",
         )
 
-    new_user = crud_users.create_user(user_create=user_in, connection=session)
+    new_user = await crud_users.create_user_async(
+        user_create=user_in,
+        connection=session,
+        hashed_password=await password_hasher.hash(user_in.password),
+    )
 
     access_token = create_jwt_token(
         subject=new_user.user_id,
@@ -127,15 +179,17 @@ def register_user(response: Response, session: SessionDep, user_in: CreateUser):
 
 
 @router.patch('/me', response_model=PublicUser)
-def update_user_me(
-    *, session: SessionDep, user_update: UpdateUser, current_user: CurrentUser
+async def update_user_me(
+    *, session: AsyncSessionDep, user_update: UpdateUser, current_user: CurrentUser
 ):
     """
     Update own user.
     """
 
     if user_update.email:
-        user = crud_users.get_user_by_email(email=user_update.email, connection=session)
+        user = await crud_users.get_user_by_email_async(
+            email=user_update.email, connection=session
+        )
 
         if user:
             raise HTTPException(
@@ -143,8 +197,15 @@ def update_user_me(
                 detail="The user with this email already exists in the system.",
             )
 
-    updated_user = crud_users.update_user(
-        user_id=current_user.user_id, user_update=user_update, connection=session
+    updated_user = await crud_users.update_user_async(
+        user_id=current_user.user_id,
+        user_update=user_update,
+        connection=session,
+        hashed_password=(
+            await password_hasher.hash(user_update.password)
+            if user_update.password
+            else None
+        ),
     )
 
     return updated_user
@@ -155,11 +216,13 @@ def update_user_me(
     dependencies=[Depends(get_current_admin_user)],
     response_model=PublicUser,
 )
-def update_user(*, user_id: UUID, user_update: UpdateUser, session: SessionDep):
+async def update_user(
+    *, user_id: UUID, user_update: UpdateUser, session: AsyncSessionDep
+):
     """
     Update a user.
     """
-    db_user = crud_users.get_user_by_id(user_id=user_id, connection=session)
+    db_user = await crud_users.get_user_by_id_async(user_id=user_id, connection=session)
 
     if not db_user:
         raise HTTPException(
@@ -167,16 +230,25 @@ def update_user(*, user_id: UUID, user_update: UpdateUser, session: SessionDep):
             detail='The user with this id does not exist in the system',
         )
 
-    if db_user.email:
-        existing_user = crud_users.get_user_by_email(user_update.email, session)
-        if existing_user and existing_user.id != user_id:
+    if user_update.email:
+        existing_user = await crud_users.get_user_by_email_async(
+            user_update.email, connection=session
+        )
+        if existing_user and existing_user.user_id != str(user_id):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail='User with this email already exists',
             )
 
-    updated_user = crud_users.update_user(
-        user_id=user_id, user_update=user_update, connection=session
+    updated_user = await crud_users.update_user_async(
+        user_id=user_id,
+        user_update=user_update,
+        connection=session,
+        hashed_password=(
+            await password_hasher.hash(user_update.password)
+            if user_update.password
+            else None
+        ),
     )
 
     return updated_user
@@ -186,11 +258,13 @@ def update_user(*, user_id: UUID, user_update: UpdateUser, session: SessionDep):
     '/{user_id}',
     dependencies=[Depends(get_current_admin_user)],
 )
-def delete_user(user_id: UUID, session: SessionDep, current_user: CurrentUser) -> dict:
+async def delete_user(
+    user_id: UUID, session: AsyncSessionDep, current_user: CurrentUser
+) -> dict:
     """
     Delete a user.
     """
-    user = crud_users.get_user_by_id(user_id=user_id, connection=session)
+    user = await crud_users.get_user_by_id_async(user_id=user_id, connection=session)
 
     if not user:
         raise HTTPException(
@@ -202,7 +276,7 @@ def delete_user(user_id: UUID, session: SessionDep, current_user: CurrentUser) -
             detail="Super users are not allowed to delete themselves",
         )
 
-    is_deleted = crud_users.delete_user(user_id=user_id, connection=session)
+    is_deleted = await crud_users.delete_user_async(user_id=user_id, connection=session)
 
     if not is_deleted:
         raise HTTPException(
@@ -0,0 +1,251 @@
+import bisect
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.db import pool, run_in_db_executor
+
+# Every cache, by name, for warming at startup and for stats
+caches: dict[str, 'TableCache | LRUCache'] = {}
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    rows: list[dict]
+    keys: list[str]
+    indexes: dict[str, dict[str, dict]]
+    # Content digest, the same in every process holding the same rows
+    digest: str
+    # time.monotonic() after which the rows are loaded again
+    expires: float
+
+
+class TableCache:
+    """Read-through cache holding a whole, small table in memory.
+
+    ``query`` must return every row ordered by ``key``. Mutations call
+    ``invalidate`` once their transaction is committed and the next read loads
+    the table again. That only reaches this process, so the table is also
+    loaded again once it is ``ttl`` seconds old.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        query: str,
+        key: str,
+        unique: tuple[str, ...] = (),
+        ttl: float = 10.0,
+    ):
+        self.name = name
+        self._query = query
+        self._key = key
+        self._unique = unique
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        # Bumped by every invalidation, so a load racing with a write is not kept
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        caches[name] = self
+
+    @property
+    def warm(self) -> bool:
+        return self._fresh() is not None
+
+    def get(
+        self,
+        value: str,
+        column: str | None = None,
+        connection: sqlite3.Connection | None = None,
+    ) -> dict | None:
+        """Row whose ``column`` (the key by default) equals ``value``."""
+        snapshot = self._read(connection)
+        return snapshot.indexes[column or self._key].get(value)
+
+    def page(
+        self,
+        limit: int,
+        after: str | None = None,
+        connection: sqlite3.Connection | None = None,
+    ) -> list[dict]:
+        """Up to ``limit`` rows in key order, starting after the key ``after``."""
+        snapshot = self._read(connection)
+        start = 0 if after is None else bisect.bisect_right(snapshot.keys, after)
+        return snapshot.rows[start : start + limit]
+
+    def count(self, connection: sqlite3.Connection | None = None) -> int:
+        return len(self._read(connection).rows)
+
+    def digest(self, connection: sqlite3.Connection | None = None) -> str:
+        """Digest of the table contents, changes whenever a row does."""
+        return self._read(connection).digest
+
+    def load(self, connection: sqlite3.Connection | None = None) -> _Snapshot:
+        with self._lock:
+            version = self._version
+            self._loads += 1
+
+        if connection is None:
+            with pool.connection() as connection:
+                rows = connection.execute(self._query).fetchall()
+        else:
+            rows = connection.execute(self._query).fetchall()
+
+        rows = [dict(row) for row in rows]
+        snapshot = _Snapshot(
+            expires=time.monotonic() + self._ttl,
+            rows=rows,
+            keys=[row[self._key] for row in rows],
+            indexes={
+                column: {row[column]: row for row in rows}
+                for column in (self._key, *self._unique)
+            },
+            digest=hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest(),
+        )
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+
+    def read_async(self, func):
+        """Awaitable twin of a cached read. It runs inline while the table is
+        loaded and only goes to the database executor when it has to load."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if self._fresh() is None:
+                return await run_in_db_executor(func, *args, **kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            snapshot = self._snapshot
+            return {
+                'rows': len(snapshot.rows) if snapshot else None,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'loads': self._loads,
+            }
+
+    def _fresh(self) -> _Snapshot | None:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.expires <= time.monotonic():
+            return None
+        return snapshot
+
+    def _read(self, connection: sqlite3.Connection | None) -> _Snapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            with self._lock:
+                self._hits += 1
+            return snapshot
+
+        with self._lock:
+            self._misses += 1
+        return self.load(connection)
+
+
+class LRUCache:
+    """Bounded, thread-safe mapping whose entries expire after ``ttl`` seconds.
+
+    The least recently used entry is evicted once ``maxsize`` is reached.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
+        # Bumped by every invalidation, see ``set``
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        caches[name] = self
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(
+        self, key, value, ttl: float | None = None, generation: int | None = None
+    ) -> None:
+        """Store ``value``; ``ttl`` may only shorten the default lifetime.
+
+        Pass the ``generation`` read before loading the value, so a value
+        loaded while an invalidation happened is not stored.
+        """
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self._maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+            }
+
+
+def warm_caches() -> None:
+    for cache in caches.values():
+        if isinstance(cache, TableCache):
+            cache.load()
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in caches.items()}
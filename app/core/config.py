@@ -1,4 +1,4 @@
-from pydantic import computed_field
+from pydantic import computed_field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 
@@ -22,9 +22,73 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     ALGORITHM: str = 'HS256'
+    REVOKED_TOKENS_CAPACITY: int = 100_000
+    REVOKED_TOKENS_ERROR_RATE: float = 0.01
+    REVOKED_TOKENS_PRUNE_INTERVAL: float = 3600.0
 
     # Data Base
     DATABASE_FILE: str = 'database.db'
+    DB_POOL_SIZE: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_EXECUTOR_WORKERS: int = 10
+    DB_TRACE_ENABLED: bool = False
+    DB_SLOW_QUERY_MS: float = 100.0
+    DB_WRITER_ENABLED: bool = False
+    DB_WRITER_COMMIT_WINDOW_MS: float = 1.0
+    DB_WRITER_MAX_BATCH: int = 64
+    DB_PRAGMA_PROFILE: str = 'default'
+    DB_PRAGMA_PROFILES: dict[str, dict[str, str | int]] = {
+        'default': {
+            'busy_timeout': 5000,
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -16000,
+            'mmap_size': 134217728,
+            'temp_store': 'MEMORY',
+            'foreign_keys': 'ON',
+        },
+        'durable': {
+            'busy_timeout': 10000,
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'cache_size': -8000,
+            'mmap_size': 0,
+            'temp_store': 'DEFAULT',
+            'foreign_keys': 'ON',
+        },
+        'compat': {
+            'busy_timeout': 5000,
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+            'foreign_keys': 'ON',
+        },
+    }
+    DB_BUSY_RETRIES: int = 5
+    DB_BUSY_BACKOFF: float = 0.02
+    DB_BUSY_BACKOFF_MAX: float = 0.5
+    # Number of item shard files, 0 keeps items in the main database. SQLite
+    # attaches at most 10 databases to a connection
+    DB_SHARDS: int = 0
+    # Store UUID keys as 16 byte BLOBs instead of 36 character text, for a
+    # smaller database and indexes; existing keys are converted at startup
+    DB_UUID_BLOB_KEYS: bool = False
+    # Rows read per fetchmany call when streaming exports
+    DB_EXPORT_BATCH_SIZE: int = 500
+    # Imported rows inserted per transaction, and per-row errors reported
+    DB_IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Password hashing
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Caches
+    TABLE_CACHE_TTL: float = 10.0
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 30.0
+    TOKEN_CACHE_SIZE: int = 4096
+    TOKEN_CACHE_TTL: float = 300.0
 
     @computed_field
     @property
@@ -32,6 +96,23 @@ class Settings(BaseSettings):
         """Database full path to SQLite file"""
         return Path(__file__).parent.parent / self.DATABASE_FILE
 
+    @computed_field
+    @property
+    def DATABASE_SHARD_PATHS(self) -> list[Path]:
+        """Item shard files next to the main database"""
+        path = self.DATABASE_PATH
+        return [
+            path.with_name(f'{path.stem}.shard{n}{path.suffix}')
+            for n in range(self.DB_SHARDS)
+        ]
+
+    @field_validator('DB_SHARDS')
+    @classmethod
+    def check_db_shards(cls, value: int) -> int:
+        if not 0 <= value <= 10:
+            raise ValueError('DB_SHARDS must be between 0 and 10')
+        return value
+
     # API
     API_V1_STR: str = "/api/v1"
 
@@ -1,16 +1,407 @@
+import asyncio
+import functools
+import random
 import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import AsyncIterator, Callable, Iterator
+
+import anyio
+
 from app.core.config import settings
+from app.core.exceptions import PoolTimeoutError, DatabaseBusyError
+from app.core.keys import register_key_functions
+from app.core.sharding import attach_shards, shard_schemas
+from app.core.tracing import traced_factory
+
+BUSY_ERROR_CODES = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+# PRAGMAs of the connection itself, the rest are set on every attached database
+CONNECTION_PRAGMAS = frozenset({'busy_timeout', 'foreign_keys', 'temp_store'})
 
 
-def get_db_connection() -> sqlite3.Connection:
-    connection = sqlite3.connect(settings.DATABASE_PATH)
+def apply_pragmas(connection: sqlite3.Connection, profile: str | None = None) -> None:
+    profile = profile or settings.DB_PRAGMA_PROFILE
+    try:
+        pragmas = settings.DB_PRAGMA_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f'Unknown PRAGMA profile: {profile}') from None
+
+    schemas = dict.fromkeys(['main', *shard_schemas()])
+    # busy_timeout goes first so that switching journal_mode waits for the lock
+    for name in sorted(pragmas, key=lambda pragma: pragma != 'busy_timeout'):
+        if name in CONNECTION_PRAGMAS:
+            connection.execute(f'PRAGMA {name} = {pragmas[name]}')
+            continue
+        for schema in schemas:
+            connection.execute(f'PRAGMA {schema}.{name} = {pragmas[name]}')
+
+
+def get_db_connection(**connect_kwargs) -> sqlite3.Connection:
+    if settings.DB_TRACE_ENABLED:
+        connect_kwargs['factory'] = traced_factory(
+            connect_kwargs.get('factory', sqlite3.Connection)
+        )
+
+    # Pooled connections are handed between worker threads, one owner at a time
+    connection = sqlite3.connect(
+        settings.DATABASE_PATH, check_same_thread=False, **connect_kwargs
+    )
     connection.row_factory = sqlite3.Row
+    register_key_functions(connection)
+    attach_shards(connection)
+    apply_pragmas(connection)
     return connection
 
 
+# SQLite work runs here, sized independently of the HTTP threadpool
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix='db'
+)
+
+
+async def run_in_db_executor(func, /, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        db_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def run_async(func):
+    """Build an awaitable twin of a blocking crud function."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_executor(func, *args, **kwargs)
+
+    return wrapper
+
+
+def is_busy_error(error: sqlite3.Error) -> bool:
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # Extended result codes keep the primary code in the low byte
+        return code & 0xFF in BUSY_ERROR_CODES
+    return 'database is locked' in str(error) or 'database is busy' in str(error)
+
+
+def retry_on_busy(func):
+    """Retry a write with jittered exponential backoff while SQLite is busy.
+
+    The wrapped function must be safe to re-run, i.e. do all its writes inside
+    ``with connection:`` so that a failed attempt is rolled back.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                if attempt >= settings.DB_BUSY_RETRIES:
+                    raise DatabaseBusyError('Database is busy, try again later') from e
+
+                delay = min(
+                    settings.DB_BUSY_BACKOFF * 2**attempt, settings.DB_BUSY_BACKOFF_MAX
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                attempt += 1
+
+    return wrapper
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of reusable SQLite connections."""
+
+    def __init__(
+        self,
+        factory: Callable[[], sqlite3.Connection],
+        size: int,
+        timeout: float,
+        pre_ping: bool = True,
+    ):
+        self._factory = factory
+        self._size = size
+        self._timeout = timeout
+        self._pre_ping = pre_ping
+        self._idle: deque[sqlite3.Connection] = deque()
+        self._lock = threading.Condition()
+        self._async_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = (
+            deque()
+        )
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Stats
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._discarded = 0
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.perf_counter()
+        deadline = started + self._timeout
+        waited = False
+
+        with self._lock:
+            while True:
+                reserved, connection = self._reserve()
+                if reserved:
+                    break
+
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise self._timeout_error()
+                waited = True
+                self._lock.wait(remaining)
+
+        return self._checkout(connection, started, waited)
+
+    async def acquire_async(self) -> sqlite3.Connection:
+        """Check out a connection without blocking the event loop or an executor
+        thread while the pool is exhausted."""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = started + self._timeout
+        waited = False
+
+        while True:
+            with self._lock:
+                reserved, connection = self._reserve()
+                if not reserved:
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+            if reserved:
+                break
+
+            waited = True
+            woken = False
+            try:
+                await asyncio.wait_for(waiter, deadline - time.perf_counter())
+                woken = True
+            except asyncio.TimeoutError:
+                raise self._timeout_error() from None
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    elif not woken:
+                        # A release picked this waiter just as it gave up
+                        self._notify()
+
+        return await run_in_db_executor(self._checkout, connection, started, waited)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a ``with`` block."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        reusable = True
+        if connection.in_transaction:
+            # Never hand an open transaction to the next request
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                reusable = False
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append(connection)
+            else:
+                self._created -= 1
+                if not self._closed:
+                    self._discarded += 1
+                self._close_quietly(connection)
+            self._notify()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._close_quietly(self._idle.pop())
+                self._created -= 1
+            self._lock.notify_all()
+            while self._async_waiters:
+                self._wake_async_waiter()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': self._size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_max': round(self._max_wait_time, 6),
+                'wait_time_avg': (
+                    round(self._wait_time / self._checkouts, 6)
+                    if self._checkouts
+                    else 0.0
+                ),
+                'discarded': self._discarded,
+            }
+
+    def _reserve(self) -> tuple[bool, sqlite3.Connection | None]:
+        """Claim an idle connection or a free slot. Must hold the lock.
+
+        Returns ``(False, None)`` when the pool is exhausted and ``(True, None)``
+        when the caller should open a new connection in the claimed slot.
+        """
+        if self._closed:
+            raise PoolTimeoutError('Connection pool is closed')
+        if self._idle:
+            self._in_use += 1
+            # LIFO keeps the most recently used connections warm
+            return True, self._idle.pop()
+        if self._created < self._size:
+            self._created += 1
+            self._in_use += 1
+            return True, None
+        return False, None
+
+    def _checkout(
+        self, connection: sqlite3.Connection | None, started: float, waited: bool
+    ) -> sqlite3.Connection:
+        replaced = False
+        try:
+            if connection is None:
+                connection = self._factory()
+            elif self._pre_ping and not self._is_alive(connection):
+                self._close_quietly(connection)
+                replaced = True
+                connection = self._factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+                self._notify()
+            raise
+
+        wait_time = time.perf_counter() - started
+        with self._lock:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            if replaced:
+                self._discarded += 1
+            self._wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        return connection
+
+    def _notify(self) -> None:
+        # Wake one waiter of each kind; whichever loses the race waits again
+        self._lock.notify()
+        self._wake_async_waiter()
+
+    def _wake_async_waiter(self) -> None:
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._set_waiter_result, waiter)
+                return
+
+    @staticmethod
+    def _set_waiter_result(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _timeout_error(self) -> PoolTimeoutError:
+        return PoolTimeoutError(
+            f'No database connection available after {self._timeout}s'
+        )
+
+    @staticmethod
+    def _is_alive(connection: sqlite3.Connection) -> bool:
+        try:
+            connection.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection: sqlite3.Connection) -> None:
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+
+pool = ConnectionPool(
+    get_db_connection,
+    size=settings.DB_POOL_SIZE,
+    timeout=settings.DB_POOL_TIMEOUT,
+    pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
 def get_db():
-    connection = get_db_connection()
+    connection = pool.acquire()
     try:
         yield connection
     finally:
-        connection.close()
+        pool.release(connection)
+
+
+@asynccontextmanager
+async def pooled_connection() -> AsyncIterator[sqlite3.Connection]:
+    """Check out a connection for a block of async code."""
+    connection = await pool.acquire_async()
+    try:
+        yield connection
+    finally:
+        await run_in_db_executor(pool.release, connection)
+
+
+async def get_async_db():
+    async with pooled_connection() as connection:
+        yield connection
+
+
+async def stream_from_db(
+    func: Callable[..., Iterator], /, *args, **kwargs
+) -> AsyncIterator:
+    """Iterate the blocking generator ``func(connection, *args, **kwargs)``.
+
+    Every step runs on the database executor, with a pooled connection checked
+    out until the iteration ends. Unlike ``get_async_db`` the connection
+    outlives the route handler, so a streaming response can keep reading.
+    """
+    connection = await pool.acquire_async()
+    iterator = func(connection, *args, **kwargs)
+    step = None
+    try:
+        while True:
+            step = db_executor.submit(next, iterator, None)
+            batch = await asyncio.wrap_future(step)
+            if batch is None:
+                break
+            yield batch
+    finally:
+        # Also reached when the client goes away mid-stream, cancelling us
+        with anyio.CancelScope(shield=True):
+            await run_in_db_executor(_finish_stream, step, iterator, connection)
+
+
+def _finish_stream(step, iterator: Iterator, connection: sqlite3.Connection) -> None:
+    # A cancelled step may still be running; the generator cannot be closed
+    # before it returns
+    if step is not None:
+        wait([step])
+    iterator.close()
+    pool.release(connection)
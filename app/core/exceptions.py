@@ -8,3 +8,39 @@ class CreationError(Exception):
     def __init__(self, message: str):
         self.message = message
         super().__init__(message)
+
+
+class PoolTimeoutError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class DatabaseBusyError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class InvalidCursorError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class PasswordHasherBusyError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class ImportFormatError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class KeyStorageError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
@@ -1,66 +1,46 @@
-import sqlite3
+import logging
 from uuid import uuid4
 
 from app.core.config import settings
+from app.core.db import get_db_connection
+from app.core.keys import convert_keys, key
+from app.core.migrations import migrate, SHARD_MIGRATIONS
 from app.core.security import hash_password
+from app.core.sharding import move_items_to_shards, shard_schemas
+
+logger = logging.getLogger(__name__)
 
 
 def init_db():
-    connection = sqlite3.connect(settings.DATABASE_PATH)
-    connection.row_factory = sqlite3.Row
-    cursor = connection.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON")
+    connection = get_db_connection()
     try:
-        cursor.executescript(
-            """
-        CREATE TABLE IF NOT EXISTS Categories (
-          category_id TEXT PRIMARY KEY,
-          title TEXT NOT NULL UNIQUE
-        );
-
-        CREATE TABLE IF NOT EXISTS Statuses (
-          status_id TEXT PRIMARY KEY,
-          title TEXT NOT NULL UNIQUE
-        );
-
-        CREATE TABLE IF NOT EXISTS Users (
-          user_id TEXT PRIMARY KEY,
-          first_name TEXT NOT NULL,
-          last_name TEXT NOT NULL,
-          email TEXT NOT NULL UNIQUE,
-          hashed_password TEXT NOT NULL,
-          role TEXT NOT NULL CHECK(role IN ('admin', 'user', 'guest'))
-        );
-
-        CREATE TABLE IF NOT EXISTS Items (
-          item_id TEXT PRIMARY KEY,
-          title TEXT NOT NULL,
-          description TEXT,
-          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-          updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-          category_id TEXT NULL,
-          status_id TEXT NULL,
-          user_id TEXT NOT NULL,
-          FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE SET NULL,
-          FOREIGN KEY (status_id)   REFERENCES Statuses(status_id)   ON DELETE SET NULL,
-          FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
-        );
-        """
-        )
-        hashed = hash_password(settings.ADMIN_PASSWORD)
-        cursor.execute(
-            """
-            INSERT INTO Users (user_id, first_name, last_name, email, hashed_password, role)
-            VALUES (?, ?, ?, ?, ?, 'admin')
-            ON CONFLICT(email) DO NOTHING
-            """,
-            (str(uuid4()), "Admin", "User", settings.ADMIN_EMAIL, hashed),
-        )
-        connection.commit()
-
-    except sqlite3.Error as e:
-        connection.rollback()
-        print(f"Database error: {e}")
+        migrate(connection)
+        if settings.DB_SHARDS:
+            for schema in shard_schemas():
+                migrate(connection, SHARD_MIGRATIONS, schema)
+        convert_keys(connection, shard_schemas())
+        move_items_to_shards(connection)
+
+        # Only pay for hashing when the admin really has to be created
+        admin = connection.execute(
+            'SELECT 1 FROM Users WHERE email = ?', (settings.ADMIN_EMAIL,)
+        ).fetchone()
+        if admin is None:
+            hashed = hash_password(settings.ADMIN_PASSWORD)
+            with connection:
+                connection.execute(
+                    """
+                    INSERT INTO Users (user_id, first_name, last_name, email, hashed_password, role)
+                    VALUES (?, ?, ?, ?, ?, 'admin')
+                    ON CONFLICT(email) DO NOTHING
+                    """,
+                    (key(uuid4()), "Admin", "User", settings.ADMIN_EMAIL, hashed),
+                )
+
+    except Exception:
+        # Never serve requests on a partially migrated database
+        logger.exception('Database initialisation failed')
+        raise
     finally:
         connection.close()
 
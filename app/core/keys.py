@@ -0,0 +1,111 @@
+import functools
+import sqlite3
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.exceptions import KeyStorageError
+
+# UUID keys are stored as 36 character text, or as their 16 bytes when
+# DB_UUID_BLOB_KEYS is set. Crud code binds keys through ``key`` and always
+# reads them back as text, so the API sees the same ids either way.
+
+# Tables holding UUID keys, each converted by a single statement; Items also
+# lives in every shard
+KEY_COLUMNS = {
+    'Users': ('user_id',),
+    'Categories': ('category_id',),
+    'Statuses': ('status_id',),
+    'Items': ('item_id', 'category_id', 'status_id', 'user_id'),
+}
+
+# Ids passed in a JSON array are text, this turns each ``value`` of json_each
+# into the stored form
+JSON_KEY = 'uuid_key(value)' if settings.DB_UUID_BLOB_KEYS else 'value'
+
+
+def key(value: UUID | str) -> str | bytes:
+    """A UUID key in its stored form, to bind as a query parameter."""
+    if not settings.DB_UUID_BLOB_KEYS:
+        return str(value)
+    if not isinstance(value, UUID):
+        value = UUID(str(value))
+    return value.bytes
+
+
+# Owner, category and status keys repeat from row to row
+@functools.lru_cache(maxsize=8192)
+def key_text(value: bytes) -> str:
+    # Same as str(UUID(bytes=value)), without building the UUID
+    h = value.hex()
+    return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}'
+
+
+def _sql_key(value: str | bytes | None) -> bytes | None:
+    if value is None or isinstance(value, bytes):
+        return value
+    return UUID(value).bytes
+
+
+def key_row(cursor: sqlite3.Cursor, values: tuple) -> sqlite3.Row:
+    """Row factory for BLOB keys: keys are the only BLOBs we store, so every
+    BLOB is read back as the text form of the UUID."""
+    return sqlite3.Row(
+        cursor, tuple([key_text(v) if type(v) is bytes else v for v in values])
+    )
+
+
+def register_key_functions(connection: sqlite3.Connection) -> None:
+    """Row factory and SQL functions for the configured key storage."""
+    connection.create_function('uuid_key', 1, _sql_key, deterministic=True)
+    if settings.DB_UUID_BLOB_KEYS:
+        connection.row_factory = key_row
+
+
+def convert_keys(connection: sqlite3.Connection, schemas: list[str]) -> int:
+    """Rewrite text keys as BLOBs when DB_UUID_BLOB_KEYS is set and return the
+    number of rows rewritten.
+
+    Runs when the setting is switched on for an existing database. A table is
+    rewritten by one statement, so its first row tells whether it is done.
+    Going back to text keys is not supported.
+    """
+    tables = [('main', table) for table in KEY_COLUMNS]
+    tables += [(schema, 'Items') for schema in schemas if schema != 'main']
+
+    def pending(stored: str) -> list[tuple[str, str]]:
+        found = []
+        for schema, table in tables:
+            first = connection.execute(
+                f'SELECT typeof({KEY_COLUMNS[table][0]}) FROM {schema}.{table} LIMIT 1'
+            ).fetchone()
+            if first is not None and first[0] == stored:
+                found.append((schema, table))
+        return found
+
+    if not settings.DB_UUID_BLOB_KEYS:
+        if pending('blob'):
+            raise KeyStorageError(
+                'The database stores BLOB keys, set DB_UUID_BLOB_KEYS=true;'
+                ' converting back to text keys is not supported'
+            )
+        return 0
+    if not pending('text'):
+        return 0
+
+    rewritten = 0
+    # BEGIN IMMEDIATE serialises concurrent workers starting up together
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        # Parents and children are rewritten one after the other
+        connection.execute('PRAGMA defer_foreign_keys = ON')
+        for schema, table in pending('text'):
+            assignments = ', '.join(
+                f'{column} = uuid_key({column})' for column in KEY_COLUMNS[table]
+            )
+            cursor = connection.execute(f'UPDATE {schema}.{table} SET {assignments}')
+            rewritten += cursor.rowcount
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return rewritten
@@ -0,0 +1,30 @@
+import sqlite3
+
+from app.core.sharding import shard_schemas
+
+
+def vacuum(connection: sqlite3.Connection) -> None:
+    """VACUUM the main database and every shard, then rebuild the search index.
+
+    ``ItemsFts`` is an external content index keyed on the implicit rowid of
+    ``Items``, which VACUUM may renumber, so the index is rebuilt right after.
+    Run it while the app is stopped: ``python -m app.core.maintenance``.
+    """
+    schemas = dict.fromkeys(['main', *shard_schemas()])
+    for schema in schemas:
+        connection.execute(f'VACUUM {schema}')
+    with connection:
+        for schema in schemas:
+            connection.execute(
+                f"INSERT INTO {schema}.ItemsFts (ItemsFts) VALUES ('rebuild')"
+            )
+
+
+if __name__ == '__main__':
+    from app.core.db import get_db_connection
+
+    connection = get_db_connection()
+    try:
+        vacuum(connection)
+    finally:
+        connection.close()
@@ -0,0 +1,532 @@
+import sqlite3
+from typing import Callable
+
+
+def _scope(column: str) -> str:
+    """SQL for the text form of a UUID key stored as text or as a BLOB, so
+    counter scopes stay text whichever way keys are stored."""
+    h = f'lower(hex({column}))'
+    text = (
+        f"substr({h}, 1, 8) || '-' || substr({h}, 9, 4) || '-' ||"
+        f" substr({h}, 13, 4) || '-' || substr({h}, 17, 4) || '-' || substr({h}, 21)"
+    )
+    return f"CASE typeof({column}) WHEN 'blob' THEN {text} ELSE {column} END"
+
+
+# Schema migrations keyed on PRAGMA user_version. Each step is an SQL statement
+# or a callable taking the connection; a migration's steps run in one
+# transaction together with the version bump. Never edit an applied migration,
+# append a new one instead.
+MIGRATIONS: dict[int, tuple[str | Callable[[sqlite3.Connection], None], ...]] = {
+    1: (
+        """
+        CREATE TABLE IF NOT EXISTS Categories (
+          category_id TEXT PRIMARY KEY,
+          title TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Statuses (
+          status_id TEXT PRIMARY KEY,
+          title TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Users (
+          user_id TEXT PRIMARY KEY,
+          first_name TEXT NOT NULL,
+          last_name TEXT NOT NULL,
+          email TEXT NOT NULL UNIQUE,
+          hashed_password TEXT NOT NULL,
+          role TEXT NOT NULL CHECK(role IN ('admin', 'user', 'guest'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Items (
+          item_id TEXT PRIMARY KEY,
+          title TEXT NOT NULL,
+          description TEXT,
+          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          category_id TEXT NULL,
+          status_id TEXT NULL,
+          user_id TEXT NOT NULL,
+          FOREIGN KEY (category_id) REFERENCES Categories(category_id) ON DELETE SET NULL,
+          FOREIGN KEY (status_id)   REFERENCES Statuses(status_id)   ON DELETE SET NULL,
+          FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+        )
+        """,
+    ),
+    2: (
+        # Per-user item lists, and ON DELETE CASCADE from Users
+        'CREATE INDEX IF NOT EXISTS ix_items_user_id ON Items (user_id, created_at)',
+        # ON DELETE SET NULL from Statuses and Categories
+        'CREATE INDEX IF NOT EXISTS ix_items_status_id ON Items (status_id)',
+        'CREATE INDEX IF NOT EXISTS ix_items_category_id ON Items (category_id)',
+        'CREATE INDEX IF NOT EXISTS ix_items_created_at ON Items (created_at)',
+    ),
+    3: (
+        # Keyset pagination sorts by (created_at, item_id)
+        'DROP INDEX IF EXISTS ix_items_user_id',
+        'DROP INDEX IF EXISTS ix_items_created_at',
+        'CREATE INDEX ix_items_user_id ON Items (user_id, created_at, item_id)',
+        'CREATE INDEX ix_items_created_at ON Items (created_at, item_id)',
+    ),
+    4: (
+        # Row counts kept in the same transaction as the writes; scope '' is the
+        # global total, any other scope is a user_id
+        """
+        CREATE TABLE Counters (
+          name TEXT NOT NULL,
+          scope TEXT NOT NULL DEFAULT '',
+          value INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (name, scope)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO Counters (name, scope, value)
+        SELECT 'items', '', COUNT(*) FROM Items
+        UNION ALL SELECT 'items', user_id, COUNT(*) FROM Items GROUP BY user_id
+        UNION ALL SELECT 'users', '', COUNT(*) FROM Users
+        UNION ALL SELECT 'categories', '', COUNT(*) FROM Categories
+        UNION ALL SELECT 'statuses', '', COUNT(*) FROM Statuses
+        """,
+        """
+        CREATE TRIGGER trg_items_count_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items', '', 1), ('items', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_count_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope IN ('', OLD.user_id);
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_count_move AFTER UPDATE OF user_id ON Items
+        WHEN NEW.user_id IS NOT OLD.user_id BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope = OLD.user_id;
+          INSERT INTO Counters (name, scope, value) VALUES ('items', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_users_count_insert AFTER INSERT ON Users BEGIN
+          UPDATE Counters SET value = value + 1 WHERE name = 'users' AND scope = '';
+        END
+        """,
+        """
+        CREATE TRIGGER trg_users_count_delete AFTER DELETE ON Users BEGIN
+          UPDATE Counters SET value = value - 1 WHERE name = 'users' AND scope = '';
+          DELETE FROM Counters WHERE name = 'items' AND scope = OLD.user_id;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_categories_count_insert AFTER INSERT ON Categories BEGIN
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'categories' AND scope = '';
+        END
+        """,
+        """
+        CREATE TRIGGER trg_categories_count_delete AFTER DELETE ON Categories BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'categories' AND scope = '';
+        END
+        """,
+        """
+        CREATE TRIGGER trg_statuses_count_insert AFTER INSERT ON Statuses BEGIN
+          UPDATE Counters SET value = value + 1 WHERE name = 'statuses' AND scope = '';
+        END
+        """,
+        """
+        CREATE TRIGGER trg_statuses_count_delete AFTER DELETE ON Statuses BEGIN
+          UPDATE Counters SET value = value - 1 WHERE name = 'statuses' AND scope = '';
+        END
+        """,
+    ),
+    5: (
+        # Item list filters: equality columns first, then the sort key
+        'DROP INDEX IF EXISTS ix_items_status_id',
+        'DROP INDEX IF EXISTS ix_items_category_id',
+        'CREATE INDEX ix_items_status_id ON Items (status_id, created_at, item_id)',
+        'CREATE INDEX ix_items_category_id ON Items (category_id, created_at, item_id)',
+        'CREATE INDEX ix_items_updated_at ON Items (updated_at, item_id)',
+        'CREATE INDEX ix_items_user_updated_at ON Items (user_id, updated_at, item_id)',
+        """
+        CREATE INDEX ix_items_user_status_id
+        ON Items (user_id, status_id, created_at, item_id)
+        """,
+        """
+        CREATE INDEX ix_items_user_category_id
+        ON Items (user_id, category_id, created_at, item_id)
+        """,
+    ),
+    6: (
+        # Full-text index over Items, keyed by the implicit rowid. VACUUM may
+        # renumber rowids of Items, so follow it with
+        # INSERT INTO ItemsFts (ItemsFts) VALUES ('rebuild')
+        """
+        CREATE VIRTUAL TABLE ItemsFts USING fts5(
+          title,
+          description,
+          content='Items',
+          content_rowid='rowid',
+          tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        "INSERT INTO ItemsFts (ItemsFts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER trg_items_fts_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO ItemsFts (rowid, title, description)
+          VALUES (NEW.rowid, NEW.title, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_fts_delete AFTER DELETE ON Items BEGIN
+          INSERT INTO ItemsFts (ItemsFts, rowid, title, description)
+          VALUES ('delete', OLD.rowid, OLD.title, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_fts_update AFTER UPDATE OF title, description ON Items
+        BEGIN
+          INSERT INTO ItemsFts (ItemsFts, rowid, title, description)
+          VALUES ('delete', OLD.rowid, OLD.title, OLD.description);
+          INSERT INTO ItemsFts (rowid, title, description)
+          VALUES (NEW.rowid, NEW.title, NEW.description);
+        END
+        """,
+    ),
+    7: (
+        # Revoked refresh tokens by jti, kept until the token would expire
+        """
+        CREATE TABLE RevokedTokens (
+          jti TEXT PRIMARY KEY,
+          expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        'CREATE INDEX ix_revoked_tokens_expires_at ON RevokedTokens (expires_at)',
+    ),
+    8: (
+        # Change counters behind the ETags of item lists: bumped by every
+        # insert, update and delete, globally and for the owner
+        """
+        INSERT INTO Counters (name, scope, value)
+        SELECT 'items_version', '', 0
+        UNION ALL SELECT 'items_version', user_id, 0 FROM Items GROUP BY user_id
+        """,
+        """
+        CREATE TRIGGER trg_items_version_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_version_update AFTER UPDATE ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope = OLD.user_id
+          AND OLD.user_id IS NOT NEW.user_id;
+        END
+        """,
+        """
+        CREATE TRIGGER trg_items_version_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope IN ('', OLD.user_id);
+        END
+        """,
+        'DROP TRIGGER trg_users_count_delete',
+        """
+        CREATE TRIGGER trg_users_count_delete AFTER DELETE ON Users BEGIN
+          UPDATE Counters SET value = value - 1 WHERE name = 'users' AND scope = '';
+          DELETE FROM Counters
+          WHERE name IN ('items', 'items_version') AND scope = OLD.user_id;
+        END
+        """,
+    ),
+    9: (
+        # Counter scopes are the text form of user_id even when keys are stored
+        # as BLOBs, see app.core.keys
+        'DROP TRIGGER trg_items_count_insert',
+        'DROP TRIGGER trg_items_count_delete',
+        'DROP TRIGGER trg_items_count_move',
+        'DROP TRIGGER trg_users_count_delete',
+        'DROP TRIGGER trg_items_version_insert',
+        'DROP TRIGGER trg_items_version_update',
+        'DROP TRIGGER trg_items_version_delete',
+        f"""
+        CREATE TRIGGER trg_items_count_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items', '', 1), ('items', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_items_count_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope IN ('', {_scope('OLD.user_id')});
+        END
+        """,
+        # Converting the stored form of a key is not a move
+        f"""
+        CREATE TRIGGER trg_items_count_move AFTER UPDATE OF user_id ON Items
+        WHEN {_scope('NEW.user_id')} IS NOT {_scope('OLD.user_id')} BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope = {_scope('OLD.user_id')};
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_users_count_delete AFTER DELETE ON Users BEGIN
+          UPDATE Counters SET value = value - 1 WHERE name = 'users' AND scope = '';
+          DELETE FROM Counters
+          WHERE name IN ('items', 'items_version')
+          AND scope = {_scope('OLD.user_id')};
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_items_version_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_items_version_update AFTER UPDATE ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope = {_scope('OLD.user_id')}
+          AND {_scope('OLD.user_id')} IS NOT {_scope('NEW.user_id')};
+        END
+        """,
+        f"""
+        CREATE TRIGGER trg_items_version_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope IN ('', {_scope('OLD.user_id')});
+        END
+        """,
+    ),
+}
+
+
+# Migrations of every item shard, applied with ``{schema}`` set to its name.
+# Shards cannot reference the central tables, so crud code takes over the
+# foreign key checks and the cascades from Users, Categories and Statuses.
+SHARD_MIGRATIONS: dict[int, tuple[str | Callable[[sqlite3.Connection], None], ...]] = {
+    1: (
+        """
+        CREATE TABLE {schema}.Items (
+          item_id TEXT PRIMARY KEY,
+          title TEXT NOT NULL,
+          description TEXT,
+          created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          category_id TEXT NULL,
+          status_id TEXT NULL,
+          user_id TEXT NOT NULL
+        )
+        """,
+        'CREATE INDEX {schema}.ix_items_user_id ON Items (user_id, created_at, item_id)',
+        'CREATE INDEX {schema}.ix_items_created_at ON Items (created_at, item_id)',
+        """
+        CREATE INDEX {schema}.ix_items_status_id
+        ON Items (status_id, created_at, item_id)
+        """,
+        """
+        CREATE INDEX {schema}.ix_items_category_id
+        ON Items (category_id, created_at, item_id)
+        """,
+        'CREATE INDEX {schema}.ix_items_updated_at ON Items (updated_at, item_id)',
+        """
+        CREATE INDEX {schema}.ix_items_user_updated_at
+        ON Items (user_id, updated_at, item_id)
+        """,
+        """
+        CREATE INDEX {schema}.ix_items_user_status_id
+        ON Items (user_id, status_id, created_at, item_id)
+        """,
+        """
+        CREATE INDEX {schema}.ix_items_user_category_id
+        ON Items (user_id, category_id, created_at, item_id)
+        """,
+        # Item counters of this shard only, the global total is their sum
+        """
+        CREATE TABLE {schema}.Counters (
+          name TEXT NOT NULL,
+          scope TEXT NOT NULL DEFAULT '',
+          value INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (name, scope)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO {schema}.Counters (name, scope, value) VALUES ('items', '', 0)",
+        """
+        CREATE TRIGGER {schema}.trg_items_count_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items', '', 1), ('items', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_count_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope IN ('', OLD.user_id);
+        END
+        """,
+        """
+        CREATE VIRTUAL TABLE {schema}.ItemsFts USING fts5(
+          title,
+          description,
+          content='Items',
+          content_rowid='rowid',
+          tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_fts_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO ItemsFts (rowid, title, description)
+          VALUES (NEW.rowid, NEW.title, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_fts_delete AFTER DELETE ON Items BEGIN
+          INSERT INTO ItemsFts (ItemsFts, rowid, title, description)
+          VALUES ('delete', OLD.rowid, OLD.title, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_fts_update
+        AFTER UPDATE OF title, description ON Items
+        BEGIN
+          INSERT INTO ItemsFts (ItemsFts, rowid, title, description)
+          VALUES ('delete', OLD.rowid, OLD.title, OLD.description);
+          INSERT INTO ItemsFts (rowid, title, description)
+          VALUES (NEW.rowid, NEW.title, NEW.description);
+        END
+        """,
+    ),
+    2: (
+        # Item change counters of this shard, see migration 8 of MIGRATIONS
+        """
+        INSERT INTO {schema}.Counters (name, scope, value)
+        SELECT 'items_version', '', 0
+        UNION ALL SELECT 'items_version', user_id, 0
+        FROM {schema}.Items GROUP BY user_id
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_version_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_version_update AFTER UPDATE ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', NEW.user_id, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope = OLD.user_id
+          AND OLD.user_id IS NOT NEW.user_id;
+        END
+        """,
+        """
+        CREATE TRIGGER {schema}.trg_items_version_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope IN ('', OLD.user_id);
+        END
+        """,
+    ),
+    3: (
+        # Text counter scopes whichever way keys are stored, see migration 9
+        # of MIGRATIONS
+        'DROP TRIGGER {schema}.trg_items_count_insert',
+        'DROP TRIGGER {schema}.trg_items_count_delete',
+        'DROP TRIGGER {schema}.trg_items_version_insert',
+        'DROP TRIGGER {schema}.trg_items_version_update',
+        'DROP TRIGGER {schema}.trg_items_version_delete',
+        f"""
+        CREATE TRIGGER {{schema}}.trg_items_count_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items', '', 1), ('items', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {{schema}}.trg_items_count_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value - 1
+          WHERE name = 'items' AND scope IN ('', {_scope('OLD.user_id')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {{schema}}.trg_items_version_insert AFTER INSERT ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {{schema}}.trg_items_version_update AFTER UPDATE ON Items BEGIN
+          INSERT INTO Counters (name, scope, value)
+          VALUES ('items_version', '', 1), ('items_version', {_scope('NEW.user_id')}, 1)
+          ON CONFLICT (name, scope) DO UPDATE SET value = value + 1;
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope = {_scope('OLD.user_id')}
+          AND {_scope('OLD.user_id')} IS NOT {_scope('NEW.user_id')};
+        END
+        """,
+        f"""
+        CREATE TRIGGER {{schema}}.trg_items_version_delete AFTER DELETE ON Items BEGIN
+          UPDATE Counters SET value = value + 1
+          WHERE name = 'items_version' AND scope IN ('', {_scope('OLD.user_id')});
+        END
+        """,
+    ),
+}
+
+
+def get_schema_version(connection: sqlite3.Connection, schema: str = 'main') -> int:
+    return connection.execute(f'PRAGMA {schema}.user_version').fetchone()[0]
+
+
+def migrate(
+    connection: sqlite3.Connection,
+    migrations: dict = MIGRATIONS,
+    schema: str = 'main',
+) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    latest = max(migrations)
+    if get_schema_version(connection, schema) >= latest:
+        return latest
+
+    for version in sorted(migrations):
+        # BEGIN IMMEDIATE serialises concurrent workers starting up together
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(connection, schema) >= version:
+                connection.rollback()
+                continue
+
+            for step in migrations[version]:
+                if callable(step):
+                    step(connection)
+                elif schema == 'main':
+                    connection.execute(step)
+                else:
+                    connection.execute(step.format(schema=schema))
+            connection.execute(f'PRAGMA {schema}.user_version = {version}')
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+
+    return get_schema_version(connection, schema)
@@ -0,0 +1,43 @@
+import base64
+import json
+from typing import Sequence
+
+from app.core.exceptions import InvalidCursorError
+
+
+def encode_cursor(values: Sequence[str | int | float | None]) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursorError('Invalid cursor') from None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(value, (str, int, float)) for value in values)
+    ):
+        raise InvalidCursorError('Invalid cursor')
+    return tuple(values)
+
+
+def next_page_cursor(
+    rows: list, limit: int, *key: str, prefix: Sequence = ()
+) -> str | None:
+    """Cursor for the page after ``rows``.
+
+    ``rows`` must have been fetched with ``LIMIT limit + 1``; the extra row only
+    tells that another page exists and is dropped from ``rows`` in place.
+    ``prefix`` values are stored ahead of the key, e.g. the sort order.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor([*prefix, *(last[column] for column in key)])
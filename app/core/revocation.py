@@ -0,0 +1,95 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Membership tests never give false negatives; false positives happen at
+    about ``error_rate`` once ``capacity`` keys were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self._size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self.count = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def _positions(self, key: str) -> list[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self._size for i in range(self._hashes)]
+
+
+class RevokedTokenFilter:
+    """In-memory front of the RevokedTokens table.
+
+    A miss proves that this process never saw the jti revoked, so the table is
+    only read on a hit. The filter cannot forget keys; it is rebuilt from the
+    table whenever expired tokens are pruned.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, prune_interval: float):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._rebuilt_at = time.monotonic()
+
+        # Stats
+        self._checks = 0
+        self._negatives = 0
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._filter.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        found = jti in self._filter
+        with self._lock:
+            self._checks += 1
+            self._negatives += not found
+        return found
+
+    def rebuild(self, jtis: Iterable[str]) -> None:
+        bloom = BloomFilter(self._capacity, self._error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self._filter = bloom
+            self._rebuilt_at = time.monotonic()
+
+    def prune_due(self) -> bool:
+        return time.monotonic() - self._rebuilt_at >= self._prune_interval
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'keys': self._filter.count,
+                'bits': self._filter.size,
+                'checks': self._checks,
+                'negatives': self._negatives,
+            }
@@ -1,13 +1,27 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
 from typing import Any
+from uuid import uuid4
 from enum import Enum
 from passlib.context import CryptContext
 import jwt
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.exceptions import PasswordHasherBusyError
 
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified payloads by token digest; an entry never outlives the token's exp
+token_cache = LRUCache(
+    'tokens', maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL
+)
+
 
 class TokenType(Enum):
     ACCESS_TOKEN = 'access_token'
@@ -22,27 +36,125 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_ctx.verify(plain_password, hashed_password)
 
 
+class PasswordHasher:
+    """Runs bcrypt on a small process pool, away from the request threads.
+
+    At most ``workers + queue_size`` calls are in flight; callers beyond that
+    get PasswordHasherBusyError right away instead of waiting in line.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._workers = workers
+        self._limit = workers + queue_size
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+
+        # Stats
+        self._completed = 0
+        self._rejected = 0
+
+    def start(self) -> None:
+        """Start the worker processes now, while the app runs few threads."""
+        with self._lock:
+            executor = self._get_executor()
+        executor.submit(_start_worker).result()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self._workers,
+                'in_flight': self._in_flight,
+                'queued': max(self._in_flight - self._workers, 0),
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    async def _run(self, func, *args):
+        with self._lock:
+            if self._in_flight >= self._limit:
+                self._rejected += 1
+                raise PasswordHasherBusyError(
+                    'Too many password checks in progress, try again later'
+                )
+            self._in_flight += 1
+            executor = self._get_executor()
+
+        try:
+            result = await asyncio.wrap_future(executor.submit(func, *args))
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next caller
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            self._completed += 1
+        return result
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Must hold the lock
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        return self._executor
+
+
+def _start_worker() -> None:
+    pass
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
 def create_jwt_token(
     subject: str | Any, expire_delta: timedelta, token_type: TokenType
 ) -> str:
     expire = datetime.now(timezone.utc) + expire_delta
     to_encode = {'exp': expire, 'sub': str(subject), 'token_type': token_type.value}
+    if token_type is TokenType.REFRESH_TOKEN:
+        # Identifies the token for rotation and revocation
+        to_encode['jti'] = uuid4().hex
     encoded_jwt = jwt.encode(
         to_encode, settings.JWT_SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def decode_jwt_token(token):
-    try:
+def decode_jwt_token(token: str) -> dict:
+    """Verify and decode a token, raising jwt.InvalidTokenError subclasses.
+
+    Tokens seen before are answered from ``token_cache`` without checking the
+    signature again.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is None:
         payload = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=settings.ALGORITHM
+            token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise
-    except jwt.InvalidTokenError:
-        raise
+        exp = payload.get('exp')
+        if isinstance(exp, (int, float)):
+            token_cache.set(digest, payload, ttl=exp - time.time())
+    return dict(payload)
 
 
 def is_refresh_token(payload: dict) -> bool:
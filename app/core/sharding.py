@@ -0,0 +1,87 @@
+import functools
+import hashlib
+import json
+import re
+import sqlite3
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.keys import JSON_KEY
+
+# Tables that exist in every shard; users and reference tables stay central
+SHARD_TABLES = ('Items', 'ItemsFts', 'Counters')
+_TABLE_REFERENCE = re.compile(
+    r'\b(FROM|JOIN|INTO|UPDATE)\s+(' + '|'.join(SHARD_TABLES) + r')\b'
+)
+
+
+def shard_schemas() -> list[str]:
+    """Schema names holding items, just ``main`` when sharding is off."""
+    if not settings.DB_SHARDS:
+        return ['main']
+    return [f'shard{n}' for n in range(settings.DB_SHARDS)]
+
+
+def shard_index(user_id: UUID | str) -> int:
+    # A fixed digest rather than hash(), so every process picks the same shard
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % settings.DB_SHARDS
+
+
+def shard_for(user_id: UUID | str) -> str:
+    """Schema name of the shard that stores the user's items."""
+    if not settings.DB_SHARDS:
+        return 'main'
+    return f'shard{shard_index(user_id)}'
+
+
+@functools.lru_cache(maxsize=512)
+def on_shard(query: str, schema: str) -> str:
+    """Qualify the shard tables a query reads or writes with ``schema``."""
+    if schema == 'main':
+        return query
+    return _TABLE_REFERENCE.sub(rf'\1 {schema}.\2', query)
+
+
+def attach_shards(connection: sqlite3.Connection) -> None:
+    for schema, path in zip(shard_schemas(), settings.DATABASE_SHARD_PATHS):
+        connection.execute('ATTACH DATABASE ? AS ?', (str(path), schema))
+
+
+def move_items_to_shards(connection: sqlite3.Connection) -> int:
+    """Move items left in the main database into their shards.
+
+    Runs when sharding is switched on for an existing database. The shard
+    count must not change afterwards, items are not rebalanced. The copies
+    are committed before the originals are deleted, so a crash in between
+    leaves items in both places and the next startup finishes the move.
+    """
+    if not settings.DB_SHARDS:
+        return 0
+
+    owners = [
+        row[0] for row in connection.execute('SELECT DISTINCT user_id FROM main.Items')
+    ]
+    if not owners:
+        return 0
+
+    by_shard: dict[str, list[str]] = {}
+    for user_id in owners:
+        by_shard.setdefault(shard_for(user_id), []).append(user_id)
+
+    columns = (
+        'item_id, title, description, created_at, updated_at,'
+        ' category_id, status_id, user_id'
+    )
+    with connection:
+        for schema, user_ids in by_shard.items():
+            connection.execute(
+                f'INSERT INTO {schema}.Items ({columns}) SELECT {columns}'
+                ' FROM main.Items'
+                f' WHERE user_id IN (SELECT {JSON_KEY} FROM json_each(?))'
+                ' ON CONFLICT (item_id) DO NOTHING',
+                (json.dumps(user_ids),),
+            )
+    with connection:
+        cursor = connection.execute('DELETE FROM main.Items')
+    return cursor.rowcount
@@ -0,0 +1,221 @@
+import bisect
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from importlib import import_module
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+CRUD_MODULES = (
+    'app.crud.categories',
+    'app.crud.statuses',
+    'app.crud.users',
+    'app.crud.items',
+    'app.crud.counters',
+    'app.crud.tokens',
+)
+
+
+class QueryStats:
+    """Per-query-template counters and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates: dict[str, list] = {}
+
+    def record(self, sql: str, parameters, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+
+        with self._lock:
+            entry = self._templates.get(sql)
+            if entry is None:
+                # count, total_ms, max_ms, histogram
+                entry = self._templates[sql] = [
+                    0,
+                    0.0,
+                    0.0,
+                    [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                ]
+            entry[0] += 1
+            entry[1] += elapsed_ms
+            entry[2] = max(entry[2], elapsed_ms)
+            entry[3][bucket] += 1
+
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+            logger.warning(
+                'Slow query (%.1f ms): %s params=%s',
+                elapsed_ms,
+                query_name(sql) or sql,
+                parameter_shape(parameters),
+            )
+
+    def snapshot(self) -> list[dict]:
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + ['inf']
+        with self._lock:
+            templates = {sql: list(entry) for sql, entry in self._templates.items()}
+
+        return sorted(
+            (
+                {
+                    'name': query_name(sql),
+                    'sql': sql,
+                    'count': count,
+                    'total_ms': round(total, 3),
+                    'avg_ms': round(total / count, 3),
+                    'max_ms': round(max_ms, 3),
+                    'histogram': dict(zip(labels, histogram)),
+                }
+                for sql, (count, total, max_ms, histogram) in templates.items()
+            ),
+            key=lambda entry: entry['total_ms'],
+            reverse=True,
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+query_stats = QueryStats()
+
+
+def parameter_shape(parameters) -> object:
+    """Describe bound parameters by type so that values never reach the log."""
+    if parameters is None:
+        return ()
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return tuple(type(value).__name__ for value in parameters)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times statements.
+
+    For SELECT statements the time covers preparing the statement and stepping
+    to the first row; fetching further rows is not included.
+    """
+
+    def execute(self, sql, parameters=(), /):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_stats.record(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_stats.record(sql, None, time.perf_counter() - started)
+
+    def executescript(self, sql_script, /):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            query_stats.record(sql_script, None, time.perf_counter() - started)
+
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self.cursor().executescript(sql_script)
+
+
+@functools.cache
+def traced_factory(factory: type[sqlite3.Connection]) -> type[sqlite3.Connection]:
+    if factory is sqlite3.Connection:
+        return TracedConnection
+    return type(f'Traced{factory.__name__}', (TracedConnection, factory), {})
+
+
+@functools.cache
+def registered_queries() -> dict[str, str]:
+    """Module-level ``*_query`` constants of the crud modules, by name, and the
+    queries a module builds at runtime, listed by its ``built_queries()``."""
+    queries = {}
+    for module_name in CRUD_MODULES:
+        module = import_module(module_name)
+        prefix = module_name.rsplit('.', 1)[-1]
+        for name, value in vars(module).items():
+            if name.endswith('_query') and isinstance(value, str):
+                queries[f'{prefix}.{name}'] = value
+        if hasattr(module, 'built_queries'):
+            for name, value in module.built_queries().items():
+                queries[f'{prefix}.{name}'] = value
+    return queries
+
+
+@functools.cache
+def _names_by_sql() -> dict[str, str]:
+    return {sql: name for name, sql in registered_queries().items()}
+
+
+def query_name(sql: str) -> str | None:
+    return _names_by_sql().get(sql)
+
+
+def explain_queries(connection: sqlite3.Connection) -> dict[str, list[str]]:
+    """Run EXPLAIN QUERY PLAN for every registered query.
+
+    Placeholders are bound to NULL; the plan does not depend on the values.
+    """
+    plans = {}
+    for name, sql in registered_queries().items():
+        parameters = (None,) * sql.count('?')
+        rows = connection.execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+        plans[name] = [row[3] for row in rows]
+    return plans
+
+
+def find_full_scans(
+    connection: sqlite3.Connection, allowed: frozenset[str] = frozenset()
+) -> dict[str, list[str]]:
+    """Registered queries whose plan contains a full table scan."""
+    scans = {}
+    for name, plan in explain_queries(connection).items():
+        if name in allowed:
+            continue
+        steps = [
+            step
+            for step in plan
+            if step.startswith('SCAN ')
+            and ' USING ' not in step
+            and 'VIRTUAL TABLE' not in step
+        ]
+        if steps:
+            scans[name] = steps
+    return scans
+
+
+if __name__ == '__main__':
+    import sys
+
+    from app.core.db import get_db_connection
+
+    connection = get_db_connection()
+    try:
+        full_scans = find_full_scans(connection)
+    finally:
+        connection.close()
+
+    for query, steps in full_scans.items():
+        print(f'{query}: {"; ".join(steps)}')
+    sys.exit(1 if full_scans else 0)
@@ -0,0 +1,253 @@
+import asyncio
+import functools
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.db import get_db_connection, is_busy_error, run_in_db_executor
+from app.core.exceptions import DatabaseBusyError
+
+
+class WriterConnection(sqlite3.Connection):
+    """Connection owned by the writer thread.
+
+    The writer runs each job inside a savepoint of one shared batch
+    transaction, so ``with connection:`` in crud functions becomes a nested
+    savepoint instead of a commit.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commit_callbacks: list[Callable[[], None]] = []
+
+    def __enter__(self):
+        self.execute('SAVEPOINT crud')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.execute('ROLLBACK TO crud')
+        self.execute('RELEASE crud')
+        return False
+
+
+@dataclass(slots=True)
+class WriteJob:
+    func: Callable
+    args: tuple
+    kwargs: dict
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Single writer thread that applies queued mutations with group commit.
+
+    Jobs that arrive within one commit window share a transaction. Every job
+    runs in its own savepoint, so a failing job is rolled back alone and only
+    its caller sees the error.
+    """
+
+    def __init__(self, commit_window: float, max_batch: int):
+        self._commit_window = commit_window
+        self._max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+        # Stats
+        self._batches = 0
+        self._jobs = 0
+        self._failed_jobs = 0
+        self._max_batch_seen = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, func: Callable, /, *args, **kwargs) -> Future:
+        job = WriteJob(func, args, kwargs)
+        self._queue.put(job)
+        return job.future
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'queued': self._queue.qsize(),
+            'batches': self._batches,
+            'jobs': self._jobs,
+            'failed_jobs': self._failed_jobs,
+            'avg_batch_size': (
+                round(self._jobs / self._batches, 2) if self._batches else 0.0
+            ),
+            'max_batch_size': self._max_batch_seen,
+        }
+
+    def _run(self) -> None:
+        connection = get_db_connection(factory=WriterConnection, isolation_level=None)
+        try:
+            stopping = False
+            while not stopping:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+
+                batch = [job]
+                deadline = time.monotonic() + self._commit_window
+                while len(batch) < self._max_batch:
+                    timeout = max(deadline - time.monotonic(), 0)
+                    try:
+                        job = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stopping = True
+                        break
+                    batch.append(job)
+
+                self._commit_batch(connection, batch)
+        finally:
+            connection.close()
+
+    def _commit_batch(self, connection: sqlite3.Connection, batch: list) -> None:
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            self._begin(connection)
+        except BaseException as e:
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        outcomes: list[tuple[WriteJob, Any, BaseException | None]] = []
+        for job in batch:
+            registered = len(connection.commit_callbacks)
+            connection.execute('SAVEPOINT job')
+            try:
+                result = job.func(*job.args, connection=connection, **job.kwargs)
+            except BaseException as e:
+                # The job's writes are rolled back, so are its commit callbacks
+                del connection.commit_callbacks[registered:]
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK TO job')
+                    connection.execute('RELEASE job')
+                outcomes.append((job, None, e))
+            else:
+                connection.execute('RELEASE job')
+                outcomes.append((job, result, None))
+
+            if not connection.in_transaction:
+                # SQLite aborted the whole transaction; nothing was kept
+                break
+
+        try:
+            if not connection.in_transaction:
+                raise outcomes[-1][2] or sqlite3.OperationalError(
+                    'Write transaction was aborted'
+                )
+            connection.execute('COMMIT')
+        except BaseException as e:
+            connection.commit_callbacks.clear()
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            self._record(batch, failed=len(batch))
+            return
+
+        callbacks = connection.commit_callbacks[:]
+        connection.commit_callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+        failed = 0
+        for job, result, error in outcomes:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                failed += 1
+                job.future.set_exception(error)
+        self._record(batch, failed)
+
+    def _record(self, batch: list, failed: int) -> None:
+        self._batches += 1
+        self._jobs += len(batch)
+        self._failed_jobs += failed
+        self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+    @staticmethod
+    def _begin(connection: sqlite3.Connection) -> None:
+        attempt = 0
+        while True:
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                if attempt >= settings.DB_BUSY_RETRIES:
+                    raise DatabaseBusyError('Database is busy, try again later') from e
+                delay = min(
+                    settings.DB_BUSY_BACKOFF * 2**attempt, settings.DB_BUSY_BACKOFF_MAX
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                attempt += 1
+
+
+writer = DatabaseWriter(
+    commit_window=settings.DB_WRITER_COMMIT_WINDOW_MS / 1000,
+    max_batch=settings.DB_WRITER_MAX_BATCH,
+)
+
+
+def after_commit(connection: sqlite3.Connection, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the caller's writes are committed.
+
+    Crud functions call this after their ``with connection:`` block. On the
+    writer connection that block only releases a savepoint, so the callback
+    waits for the batch commit.
+    """
+    if isinstance(connection, WriterConnection):
+        connection.commit_callbacks.append(callback)
+    else:
+        callback()
+
+
+def run_async_write(func):
+    """Build an awaitable twin of a crud mutation.
+
+    With the writer running, the call is queued for group commit on the writer
+    connection and the caller's ``connection`` argument is ignored.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not writer.running:
+            return await run_in_db_executor(func, *args, **kwargs)
+        kwargs.pop('connection', None)
+        return await asyncio.wrap_future(writer.submit(func, *args, **kwargs))
+
+    return wrapper
@@ -2,12 +2,18 @@ from uuid import uuid4, UUID
 from sqlite3 import Connection, IntegrityError
 
 from app.schemas.categories import (
-    DBCategory,
     CreateCategory,
     UpdateCategory,
-    PublicCategory,
 )
-from app.core.exceptions import DuplicateError, CreationError
+from app.core.config import settings
+from app.core.exceptions import DuplicateError, CreationError, InvalidCursorError
+from app.core.db import retry_on_busy
+from app.core.keys import key
+from app.core.writer import after_commit, run_async_write
+from app.core.cache import TableCache
+from app.core.pagination import decode_cursor, next_page_cursor
+from app.crud import items as crud_items
+from app.crud.rows import CategoryRecord, record_mapper
 
 # Queries
 add_category_query = (
@@ -16,24 +22,32 @@ add_category_query = (
 update_category_title_query = (
     'UPDATE Categories SET title = ? WHERE category_id = ? RETURNING *'
 )
-get_category_by_id_query = 'SELECT * FROM Categories WHERE category_id = ?'
-get_categories_query = (
-    'SELECT * FROM Categories ORDER BY category_id ASC LIMIT ? OFFSET ?'
-)
-get_category_by_title_query = 'SELECT * FROM Categories WHERE title = ?'
+get_all_categories_query = 'SELECT * FROM Categories ORDER BY category_id'
 delete_category_query = 'DELETE FROM Categories WHERE category_id = ?'
 
+# Reads are served from memory, mutations invalidate the cache once committed;
+# writes of other processes show within the TTL
+category_cache = TableCache(
+    'categories',
+    get_all_categories_query,
+    key='category_id',
+    unique=('title',),
+    ttl=settings.TABLE_CACHE_TTL,
+)
+category_record = record_mapper(CategoryRecord)
+
 
+@retry_on_busy
 def create_category(
     category_create: CreateCategory, connection: Connection
-) -> DBCategory | None:
+) -> CategoryRecord | None:
     try:
         with connection:
-            category_id = str(uuid4())
+            category_id = uuid4()
             cursor = connection.execute(
                 add_category_query,
                 (
-                    category_id,
+                    key(category_id),
                     category_create.title.lower().strip(),
                 ),
             )
@@ -41,7 +55,8 @@ def create_category(
 
             if not category:
                 raise CreationError(f'Category not found after creating: {category_id}')
-            return DBCategory(**dict(category))
+        after_commit(connection, category_cache.invalidate)
+        return category_record(category)
     except IntegrityError as e:
         # Title has UNIQUE type in Data Base
         if "Categories.title" in str(e):
@@ -49,43 +64,77 @@ def create_category(
         raise
 
 
+@retry_on_busy
 def update_category(
     category_id: UUID, category_update: UpdateCategory, connection: Connection
-) -> DBCategory | None:
+) -> CategoryRecord | None:
     with connection:
         cursor = connection.execute(
             update_category_title_query,
             (
                 category_update.title.lower().strip(),
-                str(category_id),
+                key(category_id),
             ),
         )
         category = cursor.fetchone()
-    return DBCategory(**dict(category)) if category else None
+    after_commit(connection, category_cache.invalidate)
+    return category_record(category) if category else None
 
 
+@retry_on_busy
 def delete_category(category_id: UUID, connection: Connection) -> bool:
     with connection:
-        cursor = connection.execute(delete_category_query, (str(category_id),))
+        crud_items.clear_item_category(category_id, connection)
+    with connection:
+        cursor = connection.execute(delete_category_query, (key(category_id),))
+    after_commit(connection, category_cache.invalidate)
     return cursor.rowcount > 0
 
 
-def get_category_by_id(category_id: UUID, connection: Connection) -> DBCategory | None:
-    cursor = connection.execute(get_category_by_id_query, (str(category_id),))
-    category = cursor.fetchone()
-    return DBCategory(**dict(category)) if category else None
+def get_category_by_id(
+    category_id: UUID, connection: Connection | None = None
+) -> CategoryRecord | None:
+    category = category_cache.get(str(category_id), connection=connection)
+    return category_record(category) if category else None
 
 
-def get_category_by_title(title: str, connection: Connection) -> DBCategory | None:
-    cursor = connection.execute(get_category_by_title_query, (title.lower().strip(),))
-    category = cursor.fetchone()
-    return DBCategory(**dict(category)) if category else None
+def get_category_by_title(
+    title: str, connection: Connection | None = None
+) -> CategoryRecord | None:
+    category = category_cache.get(
+        title.lower().strip(), column='title', connection=connection
+    )
+    return category_record(category) if category else None
 
 
 def get_categories(
-    connection: Connection, limit: int, offset: int
-) -> list[PublicCategory]:
-    cursor = connection.execute(get_categories_query, (limit, offset))
-    categories = cursor.fetchall()
+    limit: int, cursor: str | None = None, connection: Connection | None = None
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    if after is not None and not isinstance(after, str):
+        raise InvalidCursorError('Invalid cursor')
+    categories = category_cache.page(limit + 1, after=after, connection=connection)
+    next_cursor = next_page_cursor(categories, limit, 'category_id')
+
+    # The cached rows already have the public shape; callers must not change them
+    return categories, next_cursor
+
+
+def count_categories(connection: Connection | None = None) -> int:
+    return category_cache.count(connection=connection)
+
+
+def get_categories_digest(connection: Connection | None = None) -> str:
+    return category_cache.digest(connection=connection)
+
 
-    return [PublicCategory(**dict(category)) for category in categories]
+# Async variants; mutations go through the writer when it is enabled, cached
+# reads only leave the event loop to load the table
+create_category_async = run_async_write(create_category)
+update_category_async = run_async_write(update_category)
+delete_category_async = run_async_write(delete_category)
+get_category_by_id_async = category_cache.read_async(get_category_by_id)
+get_category_by_title_async = category_cache.read_async(get_category_by_title)
+get_categories_async = category_cache.read_async(get_categories)
+count_categories_async = category_cache.read_async(count_categories)
+get_categories_digest_async = category_cache.read_async(get_categories_digest)
@@ -0,0 +1,21 @@
+from uuid import UUID
+from sqlite3 import Connection
+
+from app.core.db import run_async
+from app.core.sharding import on_shard
+
+# Queries
+get_counter_query = 'SELECT value FROM Counters WHERE name = ? AND scope = ?'
+
+
+def get_counter(
+    name: str, connection: Connection, scope: UUID | str = '', schema: str = 'main'
+) -> int:
+    """Exact row count maintained by triggers; scope '' is the global total."""
+    cursor = connection.execute(on_shard(get_counter_query, schema), (name, str(scope)))
+    counter = cursor.fetchone()
+    return counter['value'] if counter else 0
+
+
+# Async variants
+get_counter_async = run_async(get_counter)
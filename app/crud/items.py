@@ -1,7 +1,36 @@
+import heapq
+import json
+from itertools import islice
+from typing import Iterator
 from uuid import uuid4, UUID
-from sqlite3 import Connection
+from datetime import datetime, timezone
+from sqlite3 import Connection, IntegrityError
 
-from app.schemas.items import DBItem, CreateItem, UpdateItem, PublicItem
+from app.schemas.items import (
+    CreateItem,
+    UpdateItem,
+    PublicItem,
+    ItemFilters,
+    ItemSort,
+    BulkUpdateItem,
+    BulkItemStatus,
+)
+from app.crud.counters import get_counter
+from app.crud.rows import (
+    BulkItemResultRecord,
+    BulkItemResultsRecord,
+    ItemRecord,
+    record_mapper,
+    row_mapper,
+)
+from app.crud.updates import build_update_query
+from app.core.config import settings
+from app.core.exceptions import InvalidCursorError
+from app.core.keys import JSON_KEY, key
+from app.core.db import retry_on_busy, run_async
+from app.core.sharding import on_shard, shard_for, shard_schemas
+from app.core.pagination import decode_cursor, next_page_cursor
+from app.core.writer import run_async_write
 
 # Queries
 add_item_query = (
@@ -9,93 +38,762 @@ add_item_query = (
     ' VALUES (?, ?, ?, ?, ?, ?) RETURNING *'
 )
 
-update_item_title_query = 'UPDATE Items SET title = ? WHERE item_id = ?'
-update_item_description_query = 'UPDATE Items SET description = ? WHERE item_id = ?'
-update_item_category_id_query = 'UPDATE Items SET category_id = ? WHERE item_id = ?'
-update_item_status_id_query = 'UPDATE Items SET status_id = ? WHERE item_id = ?'
+bulk_add_item_query = (
+    'INSERT INTO Items (item_id, title, description, category_id, status_id, user_id)'
+    ' VALUES (?, ?, ?, ?, ?, ?)'
+)
 
 get_item_by_id_query = 'SELECT * FROM Items WHERE item_id = ?'
-get_items_query = 'SELECT * FROM Items WHERE user_id = IFNULL(?, user_id) ORDER BY user_id ASC LIMIT ? OFFSET ?'
+item_exists_query = 'SELECT 1 FROM Items WHERE item_id = ?'
+get_item_owner_query = 'SELECT user_id FROM Items WHERE item_id = ?'
 delete_item_query = 'DELETE FROM Items WHERE item_id = ?'
 
+# Cascades from the central tables, done by crud when items are sharded
+delete_user_items_query = 'DELETE FROM Items WHERE user_id = ?'
+delete_user_items_counter_query = (
+    "DELETE FROM Counters WHERE name IN ('items', 'items_version') AND scope = ?"
+)
+clear_item_category_query = 'UPDATE Items SET category_id = NULL WHERE category_id = ?'
+clear_item_status_query = 'UPDATE Items SET status_id = NULL WHERE status_id = ?'
+
+# Set-based lookups for bulk operations, the ids are passed as a JSON array
+get_items_by_ids_query = (
+    f'SELECT * FROM Items WHERE item_id IN (SELECT {JSON_KEY} FROM json_each(?))'
+)
+get_item_owners_query = (
+    'SELECT item_id, user_id FROM Items'
+    f' WHERE item_id IN (SELECT {JSON_KEY} FROM json_each(?))'
+)
+get_existing_category_ids_query = (
+    'SELECT category_id FROM Categories'
+    f' WHERE category_id IN (SELECT {JSON_KEY} FROM json_each(?))'
+)
+get_existing_status_ids_query = (
+    'SELECT status_id FROM Statuses'
+    f' WHERE status_id IN (SELECT {JSON_KEY} FROM json_each(?))'
+)
+
+# Columns an update may set, with how the new value is stored
+ITEM_UPDATE_COLUMNS = {
+    'title': lambda value: value.lower().strip(),
+    'description': lambda value: value,
+    'category_id': key,
+    'status_id': key,
+}
+ITEM_NULLABLE_COLUMNS = frozenset({'description', 'category_id', 'status_id'})
+
+# Item lists are built from whitelisted filters, see _item_conditions
+select_items_sql = 'SELECT * FROM Items'
+count_items_sql = 'SELECT COUNT(*) FROM Items'
+
+# Exports walk the creation-time indexes, so no sort is needed
+export_items_query = 'SELECT * FROM Items ORDER BY created_at, item_id'
+export_user_items_query = (
+    'SELECT * FROM Items WHERE user_id = ? ORDER BY created_at, item_id'
+)
+
+# CROSS JOIN keeps the FTS match as the outer loop, so the cost follows the
+# number of matches rather than the size of a user's item list. Pages are
+# keyed on (score, item_id); item_id rather than rowid breaks ties, as rowids
+# repeat across shards
+_search_sql = (
+    'SELECT Items.*, bm25(ItemsFts) AS score FROM ItemsFts CROSS JOIN Items ON Items.rowid = ItemsFts.rowid'
+    ' WHERE ItemsFts MATCH ?'
+)
+_search_user_sql = _search_sql + ' AND Items.user_id = ?'
+_search_after_sql = ' AND (bm25(ItemsFts), Items.item_id) > (?, ?)'
+_search_order_sql = ' ORDER BY bm25(ItemsFts), Items.item_id LIMIT ?'
+search_items_query = _search_sql + _search_order_sql
+search_items_after_query = _search_sql + _search_after_sql + _search_order_sql
+search_user_items_query = _search_user_sql + _search_order_sql
+search_user_items_after_query = _search_user_sql + _search_after_sql + _search_order_sql
+count_search_items_query = 'SELECT COUNT(*) FROM ItemsFts WHERE ItemsFts MATCH ?'
+count_search_user_items_query = (
+    'SELECT COUNT(*) FROM ItemsFts CROSS JOIN Items ON Items.rowid = ItemsFts.rowid'
+    ' WHERE ItemsFts MATCH ? AND Items.user_id = ?'
+)
 
+# List responses are built from rows without a PublicItem per row
+public_item = row_mapper(PublicItem)
+item_record = record_mapper(ItemRecord)
+
+ITEM_SORTS = {
+    ItemSort.created_at: ('created_at', 'ASC'),
+    ItemSort.created_at_desc: ('created_at', 'DESC'),
+    ItemSort.updated_at: ('updated_at', 'ASC'),
+    ItemSort.updated_at_desc: ('updated_at', 'DESC'),
+}
+
+
+def _probe_order(user_id: UUID | None = None) -> list[str]:
+    """Every shard, the one storing the items of ``user_id`` first."""
+    schemas = shard_schemas()
+    if user_id is None or len(schemas) == 1:
+        return schemas
+    home = shard_for(user_id)
+    return [home, *(schema for schema in schemas if schema != home)]
+
+
+def _locate_item(
+    item_id: UUID, connection: Connection, user_id: UUID | None = None
+) -> str | None:
+    """Schema of the shard storing the item, None when it does not exist."""
+    schemas = _probe_order(user_id)
+    if len(schemas) == 1:
+        return schemas[0]
+    for schema in schemas:
+        query = on_shard(item_exists_query, schema)
+        if connection.execute(query, (key(item_id),)).fetchone():
+            return schema
+    return None
+
+
+def _item_row(item_id: UUID, user_id: UUID, item_create: CreateItem) -> tuple:
+    # Parameters of add_item_query and bulk_add_item_query
+    return (
+        key(item_id),
+        item_create.title.lower().strip(),
+        item_create.description,
+        key(item_create.category_id) if item_create.category_id else None,
+        key(item_create.status_id) if item_create.status_id else None,
+        key(user_id),
+    )
+
+
+def _check_references(connection: Connection, element: CreateItem | UpdateItem):
+    # Shards cannot hold foreign keys to the central tables, check them here
+    if settings.DB_SHARDS and _missing_references(connection, [element])[0]:
+        raise IntegrityError('FOREIGN KEY constraint failed')
+
+
+@retry_on_busy
 def create_item(
     user_id: UUID, item_create: CreateItem, connection: Connection
-) -> DBItem | None:
+) -> ItemRecord | None:
     with connection:
-        item_id = str(uuid4())
+        _check_references(connection, item_create)
         cursor = connection.execute(
-            add_item_query,
-            (
-                item_id,
-                item_create.title.lower().strip(),
-                item_create.description,
-                str(item_create.category_id) if item_create.category_id else None,
-                str(item_create.status_id) if item_create.status_id else None,
-                str(user_id),
-            ),
+            on_shard(add_item_query, shard_for(user_id)),
+            _item_row(uuid4(), user_id, item_create),
         )
         item = cursor.fetchone()
-    return DBItem(**dict(item)) if item else None
+    return item_record(item) if item else None
 
 
+@retry_on_busy
 def update_item(
-    item_id: UUID, item_update: UpdateItem, connection: Connection
-) -> DBItem | None:
-    payload = item_update.model_dump(exclude_unset=True)
-    if not payload:
+    item_id: UUID,
+    item_update: UpdateItem,
+    connection: Connection,
+    user_id: UUID | None = None,
+) -> ItemRecord | None:
+    """Apply a partial update; ``user_id`` is the owner, if already known."""
+    query, params = build_update_query(
+        'Items',
+        'item_id',
+        ITEM_UPDATE_COLUMNS,
+        item_update.model_dump(exclude_unset=True),
+        nullable=ITEM_NULLABLE_COLUMNS,
+        touch_updated_at=True,
+    )
+    if query is None:
+        return get_item_by_id(item_id, connection, user_id)
+
+    schema = _locate_item(item_id, connection, user_id)
+    if schema is None:
         return None
 
     with connection:
-        changed = False
-        if item_update.title is not None:
-            connection.execute(
-                update_item_title_query,
-                (item_update.title.lower().strip(), str(item_id)),
-            )
-            changed = True
-        if item_update.description is not None:
-            connection.execute(
-                update_item_description_query, (item_update.description, str(item_id))
+        _check_references(connection, item_update)
+        cursor = connection.execute(on_shard(query, schema), (*params, key(item_id)))
+        db_item = cursor.fetchone()
+
+    return item_record(db_item) if db_item else None
+
+
+@retry_on_busy
+def delete_item(
+    item_id: UUID, connection: Connection, user_id: UUID | None = None
+) -> bool:
+    """Delete an item; ``user_id`` is the owner, if already known."""
+    schema = _locate_item(item_id, connection, user_id)
+    if schema is None:
+        return False
+
+    with connection:
+        cursor = connection.execute(
+            on_shard(delete_item_query, schema), (key(item_id),)
+        )
+    return cursor.rowcount > 0
+
+
+def get_item_by_id(
+    item_id: UUID, connection: Connection, user_id: UUID | None = None
+) -> ItemRecord | None:
+    """Find an item; with sharding the shard of ``user_id`` is tried first."""
+    for schema in _probe_order(user_id):
+        cursor = connection.execute(
+            on_shard(get_item_by_id_query, schema), (key(item_id),)
+        )
+        item = cursor.fetchone()
+        if item:
+            return item_record(item)
+    return None
+
+
+def get_items_version(connection: Connection, user_id: UUID | None = None) -> int:
+    """Change counter of the user's items, or of all items; it grows with
+    every insert, update and delete."""
+    schemas = shard_schemas() if user_id is None else [shard_for(user_id)]
+    return sum(
+        get_counter('items_version', connection, scope=user_id or '', schema=schema)
+        for schema in schemas
+    )
+
+
+def get_item_version(
+    item_id: UUID, connection: Connection, user_id: UUID | None = None
+) -> tuple[str, int] | None:
+    """Owner of an item and the change counter of their items, None when the
+    item does not exist; cheaper than reading the item itself."""
+    for schema in _probe_order(user_id):
+        cursor = connection.execute(
+            on_shard(get_item_owner_query, schema), (key(item_id),)
+        )
+        owner = cursor.fetchone()
+        if owner:
+            version = get_counter(
+                'items_version', connection, scope=owner['user_id'], schema=schema
             )
-            changed = True
-        if item_update.category_id is not None:
-            connection.execute(
-                update_item_category_id_query, (item_update.category_id, str(item_id))
+            return owner['user_id'], version
+    return None
+
+
+def delete_user_items(user_id: UUID, connection: Connection) -> None:
+    """Cascade a user deletion to their shard.
+
+    Commit this before deleting the user: a transaction over several database
+    files is not atomic in WAL mode, and a crash in between should leave a
+    user without items rather than items without a user. Without sharding the
+    foreign key on Items does this.
+    """
+    if not settings.DB_SHARDS:
+        return
+    schema = shard_for(user_id)
+    connection.execute(on_shard(delete_user_items_query, schema), (key(user_id),))
+    connection.execute(
+        on_shard(delete_user_items_counter_query, schema), (str(user_id),)
+    )
+
+
+def _clear_reference(query: str, reference_id: UUID, connection: Connection):
+    # ON DELETE SET NULL across all shards, committed before the referenced
+    # row is deleted, like delete_user_items
+    if not settings.DB_SHARDS:
+        return
+    for schema in shard_schemas():
+        connection.execute(on_shard(query, schema), (key(reference_id),))
+
+
+def clear_item_category(category_id: UUID, connection: Connection) -> None:
+    _clear_reference(clear_item_category_query, category_id, connection)
+
+
+def clear_item_status(status_id: UUID, connection: Connection) -> None:
+    _clear_reference(clear_item_status_query, status_id, connection)
+
+
+def _existing_ids(connection: Connection, query: str, ids: set[str]) -> set[str]:
+    if not ids:
+        return set()
+    rows = connection.execute(query, (json.dumps(sorted(ids)),)).fetchall()
+    return {row[0] for row in rows}
+
+
+def _items_by_ids(
+    connection: Connection, ids: list[str], schemas: list[str]
+) -> dict[str, ItemRecord]:
+    items = {}
+    if not ids:
+        return items
+    for schema in schemas:
+        query = on_shard(get_items_by_ids_query, schema)
+        for row in connection.execute(query, (json.dumps(ids),)):
+            items[row['item_id']] = item_record(row)
+    return items
+
+
+def _missing_references(
+    connection: Connection, elements: list[CreateItem | UpdateItem]
+) -> list[str | None]:
+    """Per element, why its category or status reference is invalid."""
+    category_ids = {str(e.category_id) for e in elements if e.category_id}
+    status_ids = {str(e.status_id) for e in elements if e.status_id}
+    categories = _existing_ids(
+        connection, get_existing_category_ids_query, category_ids
+    )
+    statuses = _existing_ids(connection, get_existing_status_ids_query, status_ids)
+
+    problems = []
+    for element in elements:
+        if element.category_id and str(element.category_id) not in categories:
+            problems.append('Category not found')
+        elif element.status_id and str(element.status_id) not in statuses:
+            problems.append('Status not found')
+        else:
+            problems.append(None)
+    return problems
+
+
+def _check_owners(
+    connection: Connection, item_ids: list[UUID], user_id: UUID | None
+) -> tuple[list[BulkItemStatus | None], dict[str, str]]:
+    """Per id, None when the caller may change the item, else the reason;
+    along with the owner of every item found."""
+    ids = json.dumps(sorted({str(item_id) for item_id in item_ids}))
+    owners = {}
+    for schema in shard_schemas():
+        rows = connection.execute(on_shard(get_item_owners_query, schema), (ids,))
+        owners.update((row['item_id'], row['user_id']) for row in rows)
+
+    checks = []
+    for item_id in map(str, item_ids):
+        if item_id not in owners:
+            checks.append(BulkItemStatus.not_found)
+        elif user_id is not None and owners[item_id] != str(user_id):
+            checks.append(BulkItemStatus.forbidden)
+        else:
+            checks.append(None)
+    return checks, owners
+
+
+def _bulk_results(results: list[BulkItemResultRecord]) -> BulkItemResultsRecord:
+    failed = sum(
+        result.status
+        in (BulkItemStatus.not_found, BulkItemStatus.forbidden, BulkItemStatus.invalid)
+        for result in results
+    )
+    return BulkItemResultsRecord(
+        results=results, succeeded=len(results) - failed, failed=failed
+    )
+
+
+@retry_on_busy
+def create_items(
+    user_id: UUID, items_create: list[CreateItem], connection: Connection
+) -> BulkItemResultsRecord:
+    results = []
+    rows = []
+    schema = shard_for(user_id)
+    with connection:
+        problems = _missing_references(connection, items_create)
+        for index, (item_create, problem) in enumerate(zip(items_create, problems)):
+            if problem:
+                results.append(
+                    BulkItemResultRecord(
+                        index=index, status=BulkItemStatus.invalid, detail=problem
+                    )
+                )
+                continue
+
+            item_id = uuid4()
+            rows.append(_item_row(item_id, user_id, item_create))
+            results.append(
+                BulkItemResultRecord(
+                    index=index, item_id=str(item_id), status=BulkItemStatus.created
+                )
             )
-            changed = True
-        if item_update.status_id is not None:
-            connection.execute(
-                update_item_status_id_query, (item_update.status_id, str(item_id))
+
+        connection.executemany(on_shard(bulk_add_item_query, schema), rows)
+        created = _items_by_ids(
+            connection, [r.item_id for r in results if r.item_id], [schema]
+        )
+
+    for result in results:
+        if result.item_id:
+            result.item = created.get(result.item_id)
+    return _bulk_results(results)
+
+
+@retry_on_busy
+def import_items(
+    user_id: UUID, items_create: list[CreateItem], connection: Connection
+) -> list[str | None]:
+    """Insert a chunk of imported items in one transaction; per item, why it
+    was rejected or None. Unlike create_items nothing is read back."""
+    schema = shard_for(user_id)
+    with connection:
+        problems = _missing_references(connection, items_create)
+        connection.executemany(
+            on_shard(bulk_add_item_query, schema),
+            (
+                _item_row(uuid4(), user_id, item_create)
+                for item_create, problem in zip(items_create, problems)
+                if problem is None
+            ),
+        )
+    return problems
+
+
+@retry_on_busy
+def update_items(
+    items_update: list[BulkUpdateItem],
+    connection: Connection,
+    user_id: UUID | None = None,
+) -> BulkItemResultsRecord:
+    """Apply partial updates; ``user_id`` restricts changes to that owner."""
+    results = []
+    # Elements that set the same columns share one executemany statement
+    batches: dict[str, list[tuple]] = {}
+    with connection:
+        checks, owners = _check_owners(
+            connection, [e.item_id for e in items_update], user_id
+        )
+        problems = _missing_references(connection, items_update)
+        for index, element in enumerate(items_update):
+            result = BulkItemResultRecord(
+                index=index, item_id=str(element.item_id), status=BulkItemStatus.updated
             )
-            changed = True
-        if not changed:
-            return None
+            if checks[index]:
+                result.status = checks[index]
+            elif problems[index]:
+                result.status, result.detail = BulkItemStatus.invalid, problems[index]
+            else:
+                query, params = build_update_query(
+                    'Items',
+                    'item_id',
+                    ITEM_UPDATE_COLUMNS,
+                    element.model_dump(exclude_unset=True, exclude={'item_id'}),
+                    nullable=ITEM_NULLABLE_COLUMNS,
+                    touch_updated_at=True,
+                    returning=False,
+                )
+                if query is not None:
+                    schema = shard_for(owners[str(element.item_id)])
+                    batches.setdefault(on_shard(query, schema), []).append(
+                        (*params, key(element.item_id))
+                    )
+            results.append(result)
 
-        cursor = connection.execute(get_item_by_id_query, (str(item_id),))
-        db_item = cursor.fetchone()
+        for query, params in batches.items():
+            connection.executemany(query, params)
+        updated_ids = [r.item_id for r in results if r.status == BulkItemStatus.updated]
+        updated = _items_by_ids(
+            connection,
+            updated_ids,
+            list(dict.fromkeys(shard_for(owners[i]) for i in updated_ids)),
+        )
 
-    return DBItem(**dict(db_item)) if db_item else None
+    for result in results:
+        if result.status == BulkItemStatus.updated:
+            result.item = updated.get(result.item_id)
+    return _bulk_results(results)
 
 
-def delete_item(item_id: UUID, connection: Connection) -> bool:
+@retry_on_busy
+def delete_items(
+    item_ids: list[UUID], connection: Connection, user_id: UUID | None = None
+) -> BulkItemResultsRecord:
+    """Delete items; ``user_id`` restricts deletion to that owner."""
+    results = []
+    # Ids to delete, grouped by the shard storing them
+    batches: dict[str, list[tuple]] = {}
+    seen = set()
     with connection:
-        cursor = connection.execute(delete_item_query, (str(item_id),))
-    return cursor.rowcount > 0
+        checks, owners = _check_owners(connection, item_ids, user_id)
+        for index, (item_id, owner_check) in enumerate(zip(item_ids, checks)):
+            result = BulkItemResultRecord(
+                index=index,
+                item_id=str(item_id),
+                status=owner_check or BulkItemStatus.deleted,
+            )
+            results.append(result)
+            if owner_check is None and str(item_id) in seen:
+                # Only the first copy of an id deletes the row
+                result.status = BulkItemStatus.not_found
+                result.detail = 'Item id repeated in the request'
+            elif owner_check is None:
+                seen.add(str(item_id))
+                schema = shard_for(owners[str(item_id)])
+                batches.setdefault(schema, []).append((key(item_id),))
+        for schema, params in batches.items():
+            connection.executemany(on_shard(delete_item_query, schema), params)
+    return _bulk_results(results)
+
+
+def _db_timestamp(value: datetime) -> str:
+    # Timestamps are stored by CURRENT_TIMESTAMP, i.e. naive UTC text
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _item_conditions(
+    user_id: UUID | None, filters: ItemFilters
+) -> tuple[list[str], list]:
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append('user_id = ?')
+        params.append(key(user_id))
+    if filters.status_id is not None:
+        conditions.append('status_id = ?')
+        params.append(key(filters.status_id))
+    if filters.category_id is not None:
+        conditions.append('category_id = ?')
+        params.append(key(filters.category_id))
+    for column, bound, operator in (
+        ('created_at', filters.created_from, '>='),
+        ('created_at', filters.created_to, '<'),
+        ('updated_at', filters.updated_from, '>='),
+        ('updated_at', filters.updated_to, '<'),
+    ):
+        if bound is not None:
+            conditions.append(f'{column} {operator} ?')
+            params.append(_db_timestamp(bound))
+    return conditions, params
 
 
-def get_item_by_id(item_id: UUID, connection: Connection) -> DBItem | None:
-    cursor = connection.execute(get_item_by_id_query, (str(item_id),))
-    item = cursor.fetchone()
-    return DBItem(**dict(item)) if item else None
+def _items_query(
+    user_id: UUID | None, filters: ItemFilters, after: tuple | None = None
+) -> tuple[str, list]:
+    """One page of the item list, the page size is the last parameter.
+
+    ``after`` is the sort value and the stored item_id of the previous page's
+    last row.
+    """
+    column, direction = ITEM_SORTS[filters.sort]
+    conditions, params = _item_conditions(user_id, filters)
+    if after is not None:
+        operator = '>' if direction == 'ASC' else '<'
+        conditions.append(f'({column}, item_id) {operator} (?, ?)')
+        params.extend(after)
+
+    query = select_items_sql
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {column} {direction}, item_id {direction} LIMIT ?'
+    return query, params
+
+
+def _count_items_query(user_id: UUID | None, filters: ItemFilters) -> tuple[str, list]:
+    conditions, params = _item_conditions(user_id, filters)
+    return count_items_sql + ' WHERE ' + ' AND '.join(conditions), params
+
+
+def built_queries() -> dict[str, str]:
+    """Every shape of the item list and count queries, by name, so that their
+    plans are checked like the ``*_query`` constants; see app.core.tracing."""
+    some_id, some_time = UUID(int=0), datetime(2000, 1, 1)
+    filters = {
+        'all': {},
+        'status_id': {'status_id': some_id},
+        'category_id': {'category_id': some_id},
+        'created_at': {'created_from': some_time, 'created_to': some_time},
+        'updated_at': {'updated_from': some_time, 'updated_to': some_time},
+    }
+    queries = {}
+    for scope, user_id in (('admin', None), ('user', some_id)):
+        for filter_name, values in filters.items():
+            for sort in ItemSort:
+                query, _ = _items_query(user_id, ItemFilters(sort=sort, **values))
+                queries[f'get_items[{scope},{filter_name},{sort.value}]'] = query
+            if values:
+                query, _ = _count_items_query(user_id, ItemFilters(**values))
+                queries[f'count_items[{scope},{filter_name}]'] = query
+        for sort in ItemSort:
+            query, _ = _items_query(user_id, ItemFilters(sort=sort), after=(0, 0))
+            queries[f'get_items[{scope},next_page,{sort.value}]'] = query
+    return queries
 
 
 def get_items(
-    connection: Connection, limit: int, offset: int, user_id: UUID | None = None
-) -> list[PublicItem]:
-    user_id = None if user_id is None else str(user_id)
+    connection: Connection,
+    limit: int,
+    cursor: str | None = None,
+    user_id: UUID | None = None,
+    filters: ItemFilters | None = None,
+) -> tuple[list[dict], str | None]:
+    filters = filters or ItemFilters()
+    column, direction = ITEM_SORTS[filters.sort]
+
+    after = None
+    if cursor:
+        sort, value, item_id = decode_cursor(cursor, 3)
+        if sort != filters.sort.value:
+            raise InvalidCursorError('Cursor does not match the sort order')
+        try:
+            after = (value, key(item_id))
+        except ValueError:
+            raise InvalidCursorError('Invalid cursor') from None
+
+    query, params = _items_query(user_id, filters, after)
+    params.append(limit + 1)
+
+    schemas = shard_schemas() if user_id is None else [shard_for(user_id)]
+    pages = [
+        connection.execute(on_shard(query, schema), params).fetchall()
+        for schema in schemas
+    ]
+    if len(pages) == 1:
+        items = pages[0]
+    else:
+        # Every shard returns its page in order, merge them into one
+        merged = heapq.merge(
+            *pages,
+            key=lambda row: (row[column], row['item_id']),
+            reverse=direction == 'DESC',
+        )
+        items = list(islice(merged, limit + 1))
+    next_cursor = next_page_cursor(
+        items, limit, column, 'item_id', prefix=(filters.sort.value,)
+    )
+
+    return [public_item(item) for item in items], next_cursor
+
+
+def count_items(
+    connection: Connection,
+    user_id: UUID | None = None,
+    filters: ItemFilters | None = None,
+) -> int:
+    schemas = shard_schemas() if user_id is None else [shard_for(user_id)]
+    if filters is None or not filters.is_filtered():
+        return sum(
+            get_counter('items', connection, scope=user_id or '', schema=schema)
+            for schema in schemas
+        )
+
+    query, params = _count_items_query(user_id, filters)
+    return sum(
+        connection.execute(on_shard(query, schema), params).fetchone()[0]
+        for schema in schemas
+    )
+
+
+def export_items(
+    connection: Connection, user_id: UUID | None = None, batch_size: int = 500
+) -> Iterator[list[dict]]:
+    """Every item of the user, or all items, in creation order.
+
+    Rows are read in ``fetchmany`` batches of ``batch_size`` while the query
+    runs, so memory use does not grow with the number of items.
+    """
+    if user_id is None:
+        query, params, schemas = export_items_query, (), shard_schemas()
+    else:
+        query, params = export_user_items_query, (key(user_id),)
+        schemas = [shard_for(user_id)]
+
+    cursors = [
+        connection.execute(on_shard(query, schema), params) for schema in schemas
+    ]
+    try:
+        if len(cursors) == 1:
+            while True:
+                rows = cursors[0].fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [public_item(row) for row in rows]
+        else:
+            # Every shard is read in order, merge them as get_items does
+            merged = heapq.merge(
+                *cursors, key=lambda row: (row['created_at'], row['item_id'])
+            )
+            while True:
+                rows = list(islice(merged, batch_size))
+                if not rows:
+                    break
+                yield [public_item(row) for row in rows]
+    finally:
+        for cursor in cursors:
+            cursor.close()
+
+
+def _match_expression(q: str) -> str | None:
+    # Every word becomes a quoted FTS5 string, so user input is never parsed as
+    # query syntax; the words are ANDed together
+    words = q.split()
+    if not words:
+        return None
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def search_items(
+    connection: Connection,
+    q: str,
+    limit: int,
+    cursor: str | None = None,
+    user_id: UUID | None = None,
+) -> tuple[list[dict], str | None]:
+    match = _match_expression(q)
+    if match is None:
+        return [], None
+
+    after = ()
+    if cursor:
+        score, item_id = decode_cursor(cursor, 2)
+        if not isinstance(score, (int, float)):
+            raise InvalidCursorError('Invalid cursor')
+        try:
+            after = (score, key(item_id))
+        except ValueError:
+            raise InvalidCursorError('Invalid cursor') from None
+
+    if user_id is not None:
+        query = search_user_items_after_query if after else search_user_items_query
+        params = (match, key(user_id), *after, limit + 1)
+        schemas = [shard_for(user_id)]
+    else:
+        query = search_items_after_query if after else search_items_query
+        params = (match, *after, limit + 1)
+        schemas = shard_schemas()
+
+    pages = [
+        connection.execute(on_shard(query, schema), params).fetchall()
+        for schema in schemas
+    ]
+    if len(pages) == 1:
+        items = pages[0]
+    else:
+        # Ranks of separate shards are merged, each shard only has to return
+        # one page past the cursor
+        merged = heapq.merge(*pages, key=lambda row: (row['score'], row['item_id']))
+        items = list(islice(merged, limit + 1))
+    next_cursor = next_page_cursor(items, limit, 'score', 'item_id')
+
+    return [public_item(item) for item in items], next_cursor
+
+
+def count_search_items(
+    connection: Connection, q: str, user_id: UUID | None = None
+) -> int:
+    match = _match_expression(q)
+    if match is None:
+        return 0
+
+    if user_id is not None:
+        query = on_shard(count_search_user_items_query, shard_for(user_id))
+        return connection.execute(query, (match, key(user_id))).fetchone()[0]
+    return sum(
+        connection.execute(
+            on_shard(count_search_items_query, schema), (match,)
+        ).fetchone()[0]
+        for schema in shard_schemas()
+    )
 
-    cursor = connection.execute(get_items_query, (user_id, limit, offset))
-    items = cursor.fetchall()
 
-    return [PublicItem(**dict(item)) for item in items]
+# Async variants; mutations go through the writer when it is enabled
+create_item_async = run_async_write(create_item)
+update_item_async = run_async_write(update_item)
+delete_item_async = run_async_write(delete_item)
+create_items_async = run_async_write(create_items)
+import_items_async = run_async_write(import_items)
+update_items_async = run_async_write(update_items)
+delete_items_async = run_async_write(delete_items)
+get_item_by_id_async = run_async(get_item_by_id)
+get_item_version_async = run_async(get_item_version)
+get_items_version_async = run_async(get_items_version)
+get_items_async = run_async(get_items)
+count_items_async = run_async(count_items)
+search_items_async = run_async(search_items)
+count_search_items_async = run_async(count_search_items)
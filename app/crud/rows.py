@@ -0,0 +1,89 @@
+from dataclasses import dataclass, fields
+from operator import itemgetter
+from sqlite3 import Row
+from typing import Callable, TypeVar
+
+from pydantic import BaseModel
+
+RecordT = TypeVar('RecordT')
+
+
+# Rows as the crud layer hands them out: plain slotted objects holding the
+# stored values, UUIDs and timestamps stay text. Routes return them as they
+# are and FastAPI validates them once, against the route's response_model.
+# Caches share records between requests, so treat them as read-only.
+@dataclass(slots=True)
+class ItemRecord:
+    item_id: str
+    title: str
+    description: str | None
+    created_at: str
+    updated_at: str
+    category_id: str | None
+    status_id: str | None
+    user_id: str
+
+
+@dataclass(slots=True)
+class UserRecord:
+    user_id: str
+    first_name: str
+    last_name: str
+    email: str
+    hashed_password: str
+    role: str
+
+
+@dataclass(slots=True)
+class CategoryRecord:
+    category_id: str
+    title: str
+
+
+@dataclass(slots=True)
+class StatusRecord:
+    status_id: str
+    title: str
+
+
+# Outcome of one element of a bulk request, and of the whole request
+@dataclass(slots=True)
+class BulkItemResultRecord:
+    index: int
+    status: str
+    item_id: str | None = None
+    detail: str | None = None
+    item: ItemRecord | None = None
+
+
+@dataclass(slots=True)
+class BulkItemResultsRecord:
+    results: list[BulkItemResultRecord]
+    succeeded: int
+    failed: int
+
+
+def record_mapper(record: type[RecordT]) -> Callable[[Row | dict], RecordT]:
+    """Build a function making a ``record`` out of a row or dict, by column
+    name; columns that are not fields of the record are ignored."""
+    values = itemgetter(*(field.name for field in fields(record)))
+
+    def map_row(row: Row | dict) -> RecordT:
+        return record(*values(row))
+
+    return map_row
+
+
+def row_mapper(model: type[BaseModel]) -> Callable[[Row], dict]:
+    """Build a function copying the fields of ``model`` out of a row.
+
+    Rows of our own tables already hold valid values, so the result is a plain
+    dict in the public shape and is not validated again.
+    """
+    columns = tuple(model.model_fields)
+    values = itemgetter(*columns)
+
+    def map_row(row: Row) -> dict:
+        return dict(zip(columns, values(row)))
+
+    return map_row
@@ -1,38 +1,57 @@
 from uuid import uuid4, UUID
 from sqlite3 import Connection, IntegrityError
 
-from app.schemas.statuses import DBStatus, CreateStatus, UpdateStatus, PublicStatus
-from app.core.exceptions import CreationError, DuplicateError
+from app.schemas.statuses import CreateStatus, UpdateStatus
+from app.core.config import settings
+from app.core.exceptions import CreationError, DuplicateError, InvalidCursorError
+from app.core.db import retry_on_busy
+from app.core.keys import key
+from app.core.writer import after_commit, run_async_write
+from app.core.cache import TableCache
+from app.core.pagination import decode_cursor, next_page_cursor
+from app.crud import items as crud_items
+from app.crud.rows import StatusRecord, record_mapper
 
 # Queries
 add_status_query = 'INSERT INTO Statuses (status_id, title) VALUES (?, ?) RETURNING *'
 update_status_title_query = (
     'UPDATE Statuses SET title = ? WHERE status_id = ? RETURNING *'
 )
-get_status_by_id_query = 'SELECT * FROM Statuses WHERE status_id = ?'
-get_statuses_query = 'SELECT * FROM Statuses ORDER BY status_id ASC LIMIT ? OFFSET ?'
-get_status_by_title_query = 'SELECT * FROM Statuses WHERE title = ?'
+get_all_statuses_query = 'SELECT * FROM Statuses ORDER BY status_id'
 delete_status_query = 'DELETE FROM Statuses WHERE status_id = ?'
 
+# Reads are served from memory, mutations invalidate the cache once committed;
+# writes of other processes show within the TTL
+status_cache = TableCache(
+    'statuses',
+    get_all_statuses_query,
+    key='status_id',
+    unique=('title',),
+    ttl=settings.TABLE_CACHE_TTL,
+)
+status_record = record_mapper(StatusRecord)
+
 
+@retry_on_busy
 def create_status(
     status_create: CreateStatus, connection: Connection
-) -> DBStatus | None:
+) -> StatusRecord | None:
     try:
         with connection:
-            status_id = str(uuid4())
+            status_id = uuid4()
             cursor = connection.execute(
                 add_status_query,
                 (
-                    status_id,
+                    key(status_id),
                     status_create.title.lower().strip(),
                 ),
             )
             status = cursor.fetchone()
         if not status:
             raise CreationError(f'Status not found after creating: {status_id}')
+        after_commit(connection, status_cache.invalidate)
 
-        return DBStatus(**dict(status)) if status else None
+        return status_record(status) if status else None
     except IntegrityError as e:
         # Title has UNIQUE type in Data Base
         if "Statuses.title" in str(e):
@@ -40,41 +59,77 @@ def create_status(
         raise
 
 
+@retry_on_busy
 def update_status(
     status_id: UUID, status_update: UpdateStatus, connection: Connection
-) -> DBStatus | None:
+) -> StatusRecord | None:
     with connection:
         cursor = connection.execute(
             update_status_title_query,
             (
                 status_update.title.lower().strip(),
-                str(status_id),
+                key(status_id),
             ),
         )
         status = cursor.fetchone()
-    return DBStatus(**dict(status)) if status else None
+    after_commit(connection, status_cache.invalidate)
+    return status_record(status) if status else None
 
 
+@retry_on_busy
 def delete_status(status_id: UUID, connection: Connection) -> bool:
     with connection:
-        cursor = connection.execute(delete_status_query, (str(status_id),))
+        crud_items.clear_item_status(status_id, connection)
+    with connection:
+        cursor = connection.execute(delete_status_query, (key(status_id),))
+    after_commit(connection, status_cache.invalidate)
     return cursor.rowcount > 0
 
 
-def get_status_by_id(status_id: UUID, connection: Connection) -> DBStatus | None:
-    cursor = connection.execute(get_status_by_id_query, (str(status_id),))
-    status = cursor.fetchone()
-    return DBStatus(**dict(status)) if status else None
+def get_status_by_id(
+    status_id: UUID, connection: Connection | None = None
+) -> StatusRecord | None:
+    status = status_cache.get(str(status_id), connection=connection)
+    return status_record(status) if status else None
+
+
+def get_status_by_title(
+    title: str, connection: Connection | None = None
+) -> StatusRecord | None:
+    status = status_cache.get(
+        title.lower().strip(), column='title', connection=connection
+    )
+    return status_record(status) if status else None
+
+
+def get_statuses(
+    limit: int, cursor: str | None = None, connection: Connection | None = None
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    if after is not None and not isinstance(after, str):
+        raise InvalidCursorError('Invalid cursor')
+    statuses = status_cache.page(limit + 1, after=after, connection=connection)
+    next_cursor = next_page_cursor(statuses, limit, 'status_id')
+
+    # The cached rows already have the public shape; callers must not change them
+    return statuses, next_cursor
+
 
+def count_statuses(connection: Connection | None = None) -> int:
+    return status_cache.count(connection=connection)
 
-def get_status_by_title(title: str, connection: Connection) -> DBStatus | None:
-    cursor = connection.execute(get_status_by_title_query, (title.lower().strip(),))
-    status = cursor.fetchone()
-    return DBStatus(**dict(status)) if status else None
 
+def get_statuses_digest(connection: Connection | None = None) -> str:
+    return status_cache.digest(connection=connection)
 
-def get_statuses(connection: Connection, limit: int, offset: int) -> list[PublicStatus]:
-    cursor = connection.execute(get_statuses_query, (limit, offset))
-    statuses = cursor.fetchall()
 
-    return [PublicStatus(**dict(status)) for status in statuses]
+# Async variants; mutations go through the writer when it is enabled, cached
+# reads only leave the event loop to load the table
+create_status_async = run_async_write(create_status)
+update_status_async = run_async_write(update_status)
+delete_status_async = run_async_write(delete_status)
+get_status_by_id_async = status_cache.read_async(get_status_by_id)
+get_status_by_title_async = status_cache.read_async(get_status_by_title)
+get_statuses_async = status_cache.read_async(get_statuses)
+count_statuses_async = status_cache.read_async(count_statuses)
+get_statuses_digest_async = status_cache.read_async(get_statuses_digest)
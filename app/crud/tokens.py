@@ -0,0 +1,66 @@
+import time
+from sqlite3 import Connection
+
+from app.core.config import settings
+from app.core.db import retry_on_busy, run_in_db_executor
+from app.core.revocation import RevokedTokenFilter
+from app.core.writer import run_async_write
+
+# Queries
+revoke_token_query = (
+    'INSERT INTO RevokedTokens (jti, expires_at) VALUES (?, ?)'
+    ' ON CONFLICT (jti) DO NOTHING'
+)
+is_token_revoked_query = 'SELECT 1 FROM RevokedTokens WHERE jti = ?'
+get_revoked_tokens_query = 'SELECT jti FROM RevokedTokens WHERE expires_at > ?'
+prune_revoked_tokens_query = 'DELETE FROM RevokedTokens WHERE expires_at <= ?'
+
+# Checked before the table on every refresh. Revocations made by other
+# processes may be missing until the next prune, but rotation still catches a
+# reused token through the primary key, see revoke_token
+revoked_tokens = RevokedTokenFilter(
+    capacity=settings.REVOKED_TOKENS_CAPACITY,
+    error_rate=settings.REVOKED_TOKENS_ERROR_RATE,
+    prune_interval=settings.REVOKED_TOKENS_PRUNE_INTERVAL,
+)
+
+
+@retry_on_busy
+def revoke_token(jti: str, expires_at: int, connection: Connection) -> bool:
+    """Revoke a refresh token; False when it was already revoked."""
+    revoked_tokens.add(jti)
+    with connection:
+        cursor = connection.execute(revoke_token_query, (jti, int(expires_at)))
+    return cursor.rowcount > 0
+
+
+def _revoked_in_table(jti: str, connection: Connection) -> bool:
+    cursor = connection.execute(is_token_revoked_query, (jti,))
+    return cursor.fetchone() is not None
+
+
+def is_token_revoked(jti: str, connection: Connection) -> bool:
+    return revoked_tokens.might_contain(jti) and _revoked_in_table(jti, connection)
+
+
+@retry_on_busy
+def prune_revoked_tokens(connection: Connection) -> int:
+    """Forget tokens that expired anyway and rebuild the in-memory filter."""
+    now = int(time.time())
+    with connection:
+        cursor = connection.execute(prune_revoked_tokens_query, (now,))
+    rows = connection.execute(get_revoked_tokens_query, (now,))
+    revoked_tokens.rebuild(row['jti'] for row in rows)
+    return cursor.rowcount
+
+
+# Async variants; mutations go through the writer when it is enabled
+revoke_token_async = run_async_write(revoke_token)
+prune_revoked_tokens_async = run_async_write(prune_revoked_tokens)
+
+
+async def is_token_revoked_async(jti: str, connection: Connection) -> bool:
+    # The filter answers almost every check on the event loop
+    if not revoked_tokens.might_contain(jti):
+        return False
+    return await run_in_db_executor(_revoked_in_table, jti, connection)
@@ -0,0 +1,43 @@
+from typing import Any, Callable
+
+
+def build_update_query(
+    table: str,
+    key_column: str,
+    columns: dict[str, Callable[[Any], Any]],
+    payload: dict[str, Any],
+    nullable: frozenset[str] = frozenset(),
+    touch_updated_at: bool = False,
+    returning: bool = True,
+) -> tuple[str | None, list]:
+    """Build one ``UPDATE`` for a partial update payload.
+
+    ``payload`` is usually ``model_dump(exclude_unset=True)``. Only keys listed
+    in ``columns`` may be set, each value is stored through its converter and
+    ``None`` is skipped unless the column is ``nullable``. The key value goes
+    last in the parameters. Returns ``(None, [])`` when there is nothing to set.
+    """
+    unknown = payload.keys() - columns.keys()
+    if unknown:
+        raise ValueError(f'Cannot update {table} columns: {", ".join(sorted(unknown))}')
+
+    assignments, params = [], []
+    # Iterate the whitelist, not the payload, so equal column sets give equal SQL
+    for column, convert in columns.items():
+        if column not in payload:
+            continue
+        value = payload[column]
+        if value is None and column not in nullable:
+            continue
+        assignments.append(f'{column} = ?')
+        params.append(None if value is None else convert(value))
+
+    if not assignments:
+        return None, []
+    if touch_updated_at:
+        assignments.append('updated_at = CURRENT_TIMESTAMP')
+
+    query = f'UPDATE {table} SET {", ".join(assignments)} WHERE {key_column} = ?'
+    if returning:
+        query += ' RETURNING *'
+    return query, params
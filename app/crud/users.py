@@ -1,9 +1,20 @@
+import functools
+from typing import Iterator
 from uuid import uuid4, UUID
 from sqlite3 import Connection, IntegrityError
 
-from app.schemas.users import DBUser, CreateUser, UpdateUser, Role, PublicUser
+from app.schemas.users import CreateUser, UpdateUser, Role, PublicUser
 from app.core.security import hash_password
-from app.core.exceptions import DuplicateError, CreationError
+from app.core.exceptions import DuplicateError, CreationError, InvalidCursorError
+from app.crud.updates import build_update_query
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.db import pool, retry_on_busy, run_async, run_in_db_executor
+from app.core.keys import key
+from app.core.writer import after_commit, run_async_write
+from app.core.pagination import decode_cursor, next_page_cursor
+from app.crud import items as crud_items
+from app.crud.rows import UserRecord, record_mapper, row_mapper
 
 # Queries
 add_user_query = (
@@ -11,31 +22,49 @@ add_user_query = (
     ' VALUES (?, ?, ?, ?, ?, ?) RETURNING *'
 )
 
-update_user_first_name_query = 'UPDATE Users SET first_name = ? WHERE user_id = ?'
-update_user_last_name_query = 'UPDATE Users SET last_name = ? WHERE user_id = ?'
-update_user_email_query = 'UPDATE Users SET email = ? WHERE user_id = ?'
-update_user_hashed_password_query = (
-    'UPDATE Users SET hashed_password = ? WHERE user_id = ?'
-)
-
 get_user_by_id_query = 'SELECT * FROM Users WHERE user_id = ?'
-get_users_query = 'SELECT * FROM Users ORDER BY user_id ASC LIMIT ? OFFSET ?'
+get_users_query = 'SELECT * FROM Users ORDER BY user_id LIMIT ?'
+get_users_after_query = 'SELECT * FROM Users WHERE user_id > ? ORDER BY user_id LIMIT ?'
 get_user_by_email_query = 'SELECT * FROM Users WHERE email = ?'
+export_users_query = 'SELECT * FROM Users ORDER BY user_id'
 delete_user_query = 'DELETE FROM Users WHERE user_id = ?'
 
+# Drops hashed_password and role from user lists
+public_user = row_mapper(PublicUser)
+user_record = record_mapper(UserRecord)
+
+# Columns an update may set, with how the new value is stored
+USER_UPDATE_COLUMNS = {
+    'first_name': lambda value: value,
+    'last_name': lambda value: value,
+    'email': lambda value: value.strip().lower(),
+    'hashed_password': lambda value: value,
+}
+
+# Authenticated users by user_id; update_user and delete_user evict them, the
+# TTL bounds how long changes made by other processes go unseen
+user_cache = LRUCache(
+    'users', maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+)
+
 
+@retry_on_busy
 def create_user(
-    user_create: CreateUser, connection: Connection, role: Role = Role.user
-) -> DBUser | None:
-    user_id = str(uuid4())
-    hashed_password = hash_password(user_create.password)
+    user_create: CreateUser,
+    connection: Connection,
+    role: Role = Role.user,
+    hashed_password: str | None = None,
+) -> UserRecord | None:
+    """Insert a user; pass ``hashed_password`` to keep bcrypt out of here."""
+    user_id = uuid4()
+    hashed_password = hashed_password or hash_password(user_create.password)
 
     try:
         with connection:
             cursor = connection.execute(
                 add_user_query,
                 (
-                    user_id,
+                    key(user_id),
                     user_create.first_name,
                     user_create.last_name,
                     user_create.email.strip().lower(),
@@ -47,7 +76,7 @@ def create_user(
 
             if not user:
                 raise CreationError(f'User not found after creating: {user_id}')
-            return DBUser(**dict(user))
+            return user_record(user)
     except IntegrityError as e:
         # Email has UNIQUE type in Data Base
         if "Users.email" in str(e):
@@ -55,66 +84,119 @@ def create_user(
         raise
 
 
+@retry_on_busy
 def update_user(
-    user_id: UUID, user_update: UpdateUser, connection: Connection
-) -> DBUser | None:
+    user_id: UUID,
+    user_update: UpdateUser,
+    connection: Connection,
+    hashed_password: str | None = None,
+) -> UserRecord | None:
+    """Apply a partial update; ``hashed_password`` is the hash of the new
+    password, if the caller already computed it."""
     payload = user_update.model_dump(exclude_unset=True)
-    if not payload:
-        return None
+    password = payload.pop('password', None)
+    if password is not None:
+        payload['hashed_password'] = hashed_password or hash_password(password)
 
-    with connection:
-        changed = False
-        if user_update.first_name is not None:
-            connection.execute(
-                update_user_first_name_query, (user_update.first_name, str(user_id))
-            )
-            changed = True
-        if user_update.last_name is not None:
-            connection.execute(
-                update_user_last_name_query, (user_update.last_name, str(user_id))
-            )
-            changed = True
-        if user_update.email is not None:
-            connection.execute(
-                update_user_email_query,
-                (user_update.email.strip().lower(), str(user_id)),
-            )
-            changed = True
-        if user_update.password is not None:
-            hashed_password = hash_password(user_update.password)
-            connection.execute(
-                update_user_hashed_password_query, (hashed_password, str(user_id))
-            )
-            changed = True
-        if not changed:
-            return None
+    query, params = build_update_query('Users', 'user_id', USER_UPDATE_COLUMNS, payload)
+    if query is None:
+        return get_user_by_id(user_id, connection)
 
-        cursor = connection.execute(get_user_by_id_query, (str(user_id),))
+    with connection:
+        cursor = connection.execute(query, (*params, key(user_id)))
         db_user = cursor.fetchone()
+    after_commit(connection, functools.partial(user_cache.pop, str(user_id)))
 
-    return DBUser(**dict(db_user)) if db_user else None
+    return user_record(db_user) if db_user else None
 
 
+@retry_on_busy
 def delete_user(user_id: UUID, connection: Connection) -> bool:
     with connection:
-        cursor = connection.execute(delete_user_query, (str(user_id),))
+        crud_items.delete_user_items(user_id, connection)
+    with connection:
+        cursor = connection.execute(delete_user_query, (key(user_id),))
+    after_commit(connection, functools.partial(user_cache.pop, str(user_id)))
     return cursor.rowcount > 0
 
 
-def get_user_by_id(user_id: UUID, connection: Connection) -> DBUser | None:
-    cursor = connection.execute(get_user_by_id_query, (str(user_id),))
+def get_user_by_id(user_id: UUID, connection: Connection) -> UserRecord | None:
+    cursor = connection.execute(get_user_by_id_query, (key(user_id),))
     user = cursor.fetchone()
-    return DBUser(**dict(user)) if user else None
-
-
-def get_user_by_email(email: str, connection: Connection) -> DBUser | None:
+    return user_record(user) if user else None
+
+
+def _load_cached_user(
+    user_id: UUID, connection: Connection | None = None
+) -> UserRecord | None:
+    generation = user_cache.generation
+    if connection is None:
+        with pool.connection() as connection:
+            user = get_user_by_id(user_id, connection)
+    else:
+        user = get_user_by_id(user_id, connection)
+    if user is not None:
+        user_cache.set(str(user_id), user, generation=generation)
+    return user
+
+
+def get_cached_user(
+    user_id: UUID, connection: Connection | None = None
+) -> UserRecord | None:
+    """get_user_by_id through the user cache, for authentication."""
+    user = user_cache.get(str(user_id))
+    if user is None:
+        user = _load_cached_user(user_id, connection)
+    return user
+
+
+async def get_cached_user_async(user_id: UUID) -> UserRecord | None:
+    # Hits are answered on the event loop, only misses use the executor
+    user = user_cache.get(str(user_id))
+    if user is None:
+        user = await run_in_db_executor(_load_cached_user, user_id)
+    return user
+
+
+def get_user_by_email(email: str, connection: Connection) -> UserRecord | None:
     cursor = connection.execute(get_user_by_email_query, (email.strip().lower(),))
     user = cursor.fetchone()
-    return DBUser(**dict(user)) if user else None
+    return user_record(user) if user else None
+
 
+def get_users(
+    connection: Connection, limit: int, cursor: str | None = None
+) -> tuple[list[dict], str | None]:
+    if cursor:
+        try:
+            params = (key(decode_cursor(cursor, 1)[0]), limit + 1)
+        except ValueError:
+            raise InvalidCursorError('Invalid cursor') from None
+        users = connection.execute(get_users_after_query, params).fetchall()
+    else:
+        users = connection.execute(get_users_query, (limit + 1,)).fetchall()
+    next_cursor = next_page_cursor(users, limit, 'user_id')
 
-def get_users(connection: Connection, limit: int, offset: int) -> list[PublicUser]:
-    cursor = connection.execute(get_users_query, (limit, offset))
-    users = cursor.fetchall()
+    return [public_user(user) for user in users], next_cursor
 
-    return [PublicUser(**dict(user)) for user in users]
+
+def export_users(connection: Connection, batch_size: int = 500) -> Iterator[list[dict]]:
+    """Every user in id order, read in ``fetchmany`` batches."""
+    cursor = connection.execute(export_users_query)
+    try:
+        while True:
+            users = cursor.fetchmany(batch_size)
+            if not users:
+                break
+            yield [public_user(user) for user in users]
+    finally:
+        cursor.close()
+
+
+# Async variants; mutations go through the writer when it is enabled
+create_user_async = run_async_write(create_user)
+update_user_async = run_async_write(update_user)
+delete_user_async = run_async_write(delete_user)
+get_user_by_id_async = run_async(get_user_by_id)
+get_user_by_email_async = run_async(get_user_by_email)
+get_users_async = run_async(get_users)
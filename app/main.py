@@ -1,18 +1,71 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.cache import warm_caches
+from app.core.db import pool, db_executor
+from app.core.exceptions import (
+    PoolTimeoutError,
+    DatabaseBusyError,
+    PasswordHasherBusyError,
+)
 from app.core.init_db import init_db
+from app.core.security import password_hasher
+from app.core.writer import writer
+from app.crud import tokens as crud_tokens
 
 
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f'{settings.API_V1_STR}/openapi.json'
+    title=settings.PROJECT_NAME,
+    openapi_url=f'{settings.API_V1_STR}/openapi.json',
+    default_response_class=ORJSONResponse,
 )
 
 
 @app.on_event("startup")
 def startup():
     init_db()
+    warm_caches()
+    with pool.connection() as connection:
+        crud_tokens.prune_revoked_tokens(connection)
+    # Before the writer thread starts, so that forking the workers is safe
+    password_hasher.start()
+    if settings.DB_WRITER_ENABLED:
+        writer.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    writer.stop()
+    password_hasher.shutdown()
+    db_executor.shutdown(wait=True)
+    pool.close()
+
+
+@app.exception_handler(PoolTimeoutError)
+def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={'detail': exc.message}
+    )
+
+
+@app.exception_handler(DatabaseBusyError)
+def database_busy_handler(request: Request, exc: DatabaseBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={'detail': exc.message},
+        headers={'Retry-After': '1'},
+    )
+
+
+@app.exception_handler(PasswordHasherBusyError)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={'detail': exc.message},
+        headers={'Retry-After': '1'},
+    )
 
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
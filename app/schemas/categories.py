@@ -16,6 +16,7 @@ class PublicCategory(Category):
 class PublicCategories(BaseModel):
     categories: list[PublicCategory]
     count: int
+    next_cursor: str | None = None
 
 
 class CreateCategory(Category):
@@ -1,4 +1,5 @@
 from uuid import UUID
+from enum import Enum
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -7,7 +8,7 @@ class Item(BaseModel):
     title: str = Field(
         ..., min_length=1, max_length=150, description="Human-readable item title"
     )
-    description: str = Field(
+    description: str | None = Field(
         None, min_length=1, max_length=1000, description="Detailed item description"
     )
     category_id: UUID | None = Field(
@@ -27,7 +28,10 @@ class PublicItem(Item):
 
 class PublicItems(BaseModel):
     items: list[PublicItem] = Field(default_factory=list, description="List of items")
-    count: int = Field(..., ge=0, description="Number of items")
+    count: int = Field(..., ge=0, description="Total number of items")
+    next_cursor: str | None = Field(
+        None, description="Cursor of the next page, null on the last page"
+    )
 
 
 class DBItem(Item):
@@ -42,3 +46,82 @@ class UpdateItem(BaseModel):
     description: str | None = Field(None, description="New description")
     category_id: UUID | None = Field(None, description="New category ID (UUID)")
     status_id: UUID | None = Field(None, description="New status ID (UUID)")
+
+
+class ItemSort(str, Enum):
+    created_at = 'created_at'
+    created_at_desc = '-created_at'
+    updated_at = 'updated_at'
+    updated_at_desc = '-updated_at'
+
+
+class ItemFilters(BaseModel):
+    status_id: UUID | None = Field(None, description="Only items with this status")
+    category_id: UUID | None = Field(None, description="Only items in this category")
+    created_from: datetime | None = Field(
+        None, description="Created at or after this time"
+    )
+    created_to: datetime | None = Field(None, description="Created before this time")
+    updated_from: datetime | None = Field(
+        None, description="Updated at or after this time"
+    )
+    updated_to: datetime | None = Field(None, description="Updated before this time")
+    sort: ItemSort = Field(
+        ItemSort.created_at, description="Sort column, prefix with '-' to reverse"
+    )
+
+    def is_filtered(self) -> bool:
+        return bool(self.model_dump(exclude={'sort'}, exclude_none=True))
+
+
+class BulkItemStatus(str, Enum):
+    created = 'created'
+    updated = 'updated'
+    deleted = 'deleted'
+    not_found = 'not_found'
+    forbidden = 'forbidden'
+    invalid = 'invalid'
+
+
+class BulkUpdateItem(UpdateItem):
+    item_id: UUID = Field(..., description="ID of the item to update")
+
+
+class BulkCreateItems(BaseModel):
+    items: list[CreateItem] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUpdateItems(BaseModel):
+    items: list[BulkUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkDeleteItems(BaseModel):
+    item_ids: list[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="Position of the element in the request")
+    item_id: UUID | None = Field(None, description="Item ID (UUID)")
+    status: BulkItemStatus
+    detail: str | None = Field(None, description="Why the element was rejected")
+    item: PublicItem | None = None
+
+
+class BulkItemResults(BaseModel):
+    results: list[BulkItemResult]
+    succeeded: int = Field(..., ge=0)
+    failed: int = Field(..., ge=0)
+
+
+class ItemImportError(BaseModel):
+    line: int = Field(..., description="Line of the rejected row in the upload")
+    detail: str = Field(..., description="Why the row was rejected")
+
+
+class ItemImportResults(BaseModel):
+    imported: int = Field(0, ge=0, description="Items created")
+    failed: int = Field(0, ge=0, description="Rows rejected")
+    batches: int = Field(0, ge=0, description="Transactions committed")
+    errors: list[ItemImportError] = Field(
+        default_factory=list, description="Rejected rows, the first ones only"
+    )
@@ -16,6 +16,7 @@ class PublicStatus(Status):
 class PublicStatuses(BaseModel):
     statuses: list[PublicStatus]
     count: int
+    next_cursor: str | None = None
 
 
 class CreateStatus(Status):
@@ -37,6 +37,7 @@ class PublicUser(User):
 class PublicUsers(BaseModel):
     users: list[PublicUser]
     count: int
+    next_cursor: str | None = None
 
 
 class DBUser(User):
@@ -0,0 +1,34 @@
+import os
+
+# Settings are read when app.core.config is imported, so set them first
+os.environ.setdefault('PROJECT_NAME', 'ToDo API tests')
+os.environ.setdefault('ADMIN_EMAIL', 'admin@example.com')
+os.environ.setdefault('ADMIN_PASSWORD', 'changeme')
+os.environ.setdefault('JWT_SECRET_KEY', 'tests-secret-key-of-at-least-32-bytes')
+
+import pytest  # noqa: E402
+
+from app.core.cache import TableCache, caches  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import get_db_connection  # noqa: E402
+from app.core.init_db import init_db  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A migrated database in a temporary directory, with cold caches."""
+    monkeypatch.setattr(settings, 'DATABASE_FILE', str(tmp_path / 'app.db'))
+    for cache in caches.values():
+        if isinstance(cache, TableCache):
+            cache.invalidate()
+        else:
+            cache.clear()
+    init_db()
+    return settings.DATABASE_PATH
+
+
+@pytest.fixture
+def connection(database):
+    connection = get_db_connection()
+    yield connection
+    connection.close()
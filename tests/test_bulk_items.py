@@ -0,0 +1,57 @@
+import dataclasses
+from uuid import uuid4
+
+from app.core.config import settings
+from app.crud import items as crud_items
+from app.crud.rows import BulkItemResultsRecord, ItemRecord
+from app.schemas.items import (
+    BulkItemResults,
+    BulkItemStatus,
+    BulkUpdateItem,
+    CreateItem,
+)
+
+
+def admin_id(connection) -> str:
+    return connection.execute(
+        'SELECT user_id FROM Users WHERE email = ?', (settings.ADMIN_EMAIL,)
+    ).fetchone()[0]
+
+
+def test_delete_reports_a_repeated_id_once(connection):
+    user_id = admin_id(connection)
+    first = crud_items.create_item(user_id, CreateItem(title='first'), connection)
+    second = crud_items.create_item(user_id, CreateItem(title='second'), connection)
+    missing = uuid4()
+
+    summary = crud_items.delete_items(
+        [first.item_id, first.item_id, second.item_id, missing], connection
+    )
+
+    assert [result.status for result in summary.results] == [
+        BulkItemStatus.deleted,
+        BulkItemStatus.not_found,
+        BulkItemStatus.deleted,
+        BulkItemStatus.not_found,
+    ]
+    assert summary.results[1].detail == 'Item id repeated in the request'
+    assert (summary.succeeded, summary.failed) == (2, 2)
+    assert connection.execute('SELECT count(*) FROM Items').fetchone()[0] == 0
+
+
+def test_bulk_results_are_records(connection):
+    user_id = admin_id(connection)
+    created = crud_items.create_items(
+        user_id, [CreateItem(title='one'), CreateItem(title='two')], connection
+    )
+    updated = crud_items.update_items(
+        [BulkUpdateItem(item_id=created.results[0].item_id, title='three')],
+        connection,
+    )
+
+    for summary in (created, updated):
+        assert type(summary) is BulkItemResultsRecord
+        assert all(type(result.item) is ItemRecord for result in summary.results)
+        # The route's response_model validates the records once
+        BulkItemResults.model_validate(dataclasses.asdict(summary))
+    assert updated.results[0].item.title == 'three'
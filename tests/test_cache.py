@@ -0,0 +1,37 @@
+import time
+from uuid import uuid4
+
+from app.crud import categories as crud_categories
+from app.crud.categories import category_cache
+
+
+def add_category_elsewhere(connection, title: str) -> None:
+    # Another worker's write: this process sees no invalidation
+    with connection:
+        connection.execute(
+            'INSERT INTO Categories (category_id, title) VALUES (?, ?)',
+            (str(uuid4()), title),
+        )
+
+
+def test_table_cache_reloads_once_its_ttl_runs_out(connection, monkeypatch):
+    monkeypatch.setattr(category_cache, '_ttl', 0.2)
+    category_cache.load(connection)
+
+    add_category_elsewhere(connection, 'garden')
+
+    assert crud_categories.get_category_by_title('garden', connection) is None
+    assert category_cache.warm
+    time.sleep(0.25)
+    assert not category_cache.warm
+    found = crud_categories.get_category_by_title('garden', connection)
+    assert found is not None and found.title == 'garden'
+
+
+def test_invalidate_reloads_at_once(connection):
+    category_cache.load(connection)
+    add_category_elsewhere(connection, 'kitchen')
+
+    category_cache.invalidate()
+
+    assert crud_categories.get_category_by_title('kitchen', connection) is not None
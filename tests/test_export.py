@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.api.responses import ndjson_response
+from app.core import db
+from app.core.config import settings
+from app.core.db import ConnectionPool, get_db_connection, stream_from_db
+from app.crud import items as crud_items
+from app.schemas.items import CreateItem
+
+
+@pytest.fixture
+def pool(database, monkeypatch):
+    pool = ConnectionPool(get_db_connection, size=1, timeout=1)
+    monkeypatch.setattr(db, 'pool', pool)
+    return pool
+
+
+@pytest.fixture
+def items(connection):
+    user_id = connection.execute(
+        'SELECT user_id FROM Users WHERE email = ?', (settings.ADMIN_EMAIL,)
+    ).fetchone()[0]
+    crud_items.create_items(
+        user_id, [CreateItem(title=f'item {n}') for n in range(10)], connection
+    )
+
+
+def test_export_releases_its_connection_when_the_client_goes_away(pool, items):
+    async def send(message):
+        # The client is gone once the first rows are on their way
+        if message['type'] == 'http.response.body':
+            raise OSError('Connection reset')
+
+    async def main():
+        response = await ndjson_response(
+            stream_from_db(crud_items.export_items, batch_size=2)
+        )
+        assert pool.stats()['in_use'] == 1
+        scope = {'type': 'http', 'asgi': {'spec_version': '2.4'}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, None, send)
+        # Still referenced, so this is not left to garbage collection
+        return response, pool.stats()['in_use']
+
+    _, in_use = asyncio.run(main())
+    assert in_use == 0
+
+
+def test_export_releases_its_connection_at_the_end(pool, items):
+    chunks = []
+
+    async def send(message):
+        chunks.append(message.get('body', b''))
+
+    async def main():
+        response = await ndjson_response(
+            stream_from_db(crud_items.export_items, batch_size=3)
+        )
+        await response({'type': 'http', 'asgi': {'spec_version': '2.4'}}, None, send)
+        return pool.stats()['in_use']
+
+    assert asyncio.run(main()) == 0
+    assert b''.join(chunks).count(b'\n') == 10
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.api import imports
+from app.core import db
+from app.core.config import settings
+from app.core.db import ConnectionPool, get_db_connection
+from app.core.writer import writer
+
+
+@pytest.fixture
+def pool(database, monkeypatch):
+    pool = ConnectionPool(get_db_connection, size=1, timeout=1)
+    monkeypatch.setattr(db, 'pool', pool)
+    return pool
+
+
+@pytest.fixture(params=[False, True], ids=['direct', 'writer'])
+def writer_enabled(request, database):
+    if request.param:
+        writer.start()
+    yield request.param
+    writer.stop()
+
+
+def admin_id(connection) -> str:
+    return connection.execute(
+        'SELECT user_id FROM Users WHERE email = ?', (settings.ADMIN_EMAIL,)
+    ).fetchone()[0]
+
+
+def test_import_holds_no_connection_while_the_body_arrives(
+    connection, pool, writer_enabled
+):
+    in_use = []
+
+    async def records():
+        for line in range(1, 11):
+            # The body is still arriving, no batch is being written
+            in_use.append(pool.stats()['in_use'])
+            await asyncio.sleep(0)
+            yield line, {'title': f'item {line}'}, None
+
+    results = asyncio.run(
+        imports.import_items(
+            records(), admin_id(connection), batch_size=3, max_errors=10
+        )
+    )
+
+    assert results.imported == 10
+    assert results.batches == 4
+    assert in_use == [0] * 10
+    assert connection.execute('SELECT count(*) FROM Items').fetchone()[0] == 10
+    # Only direct writes check out a pooled connection, one per batch
+    assert pool.stats()['checkouts'] == (0 if writer_enabled else 4)
+    assert pool.stats()['in_use'] == 0
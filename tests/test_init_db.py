@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from app.core import init_db as init_db_module
+from app.core.config import settings
+from app.core.db import get_db_connection
+from app.core.init_db import init_db
+from app.core.migrations import MIGRATIONS, SHARD_MIGRATIONS, get_schema_version
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Every statement init_db runs from now on."""
+    statements = []
+
+    def traced_connection(**kwargs):
+        connection = get_db_connection(**kwargs)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    monkeypatch.setattr(init_db_module, 'get_db_connection', traced_connection)
+    return statements
+
+
+def ddl(statements: list[str]) -> list[str]:
+    keywords = ('CREATE', 'DROP', 'ALTER', 'INSERT', 'UPDATE', 'DELETE')
+    return [sql for sql in statements if sql.lstrip().upper().startswith(keywords)]
+
+
+def test_first_run_migrates_and_creates_the_admin(connection):
+    assert get_schema_version(connection) == max(MIGRATIONS)
+    admin = connection.execute(
+        'SELECT role FROM Users WHERE email = ?', (settings.ADMIN_EMAIL,)
+    ).fetchone()
+    assert admin['role'] == 'admin'
+
+
+def test_warm_start_runs_no_ddl(database, statements):
+    init_db()
+
+    assert statements
+    assert ddl(statements) == []
+
+
+def test_warm_start_of_shards_runs_no_ddl(database, statements, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_SHARDS', 2)
+    init_db()
+    assert ddl(statements)
+
+    statements.clear()
+    init_db()
+
+    assert ddl(statements) == []
+    connection = get_db_connection()
+    try:
+        for schema in ('shard0', 'shard1'):
+            assert get_schema_version(connection, schema) == max(SHARD_MIGRATIONS)
+    finally:
+        connection.close()
+
+
+def test_failed_migration_stops_startup(tmp_path, monkeypatch):
+    path = tmp_path / 'app.db'
+    # A view cannot be indexed, so the first migration fails half way
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE VIEW Items AS SELECT 1 AS item_id')
+    monkeypatch.setattr(settings, 'DATABASE_FILE', str(path))
+
+    with pytest.raises(sqlite3.OperationalError):
+        init_db()
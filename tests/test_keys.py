@@ -0,0 +1,135 @@
+import pytest
+
+from app.core.config import settings
+from app.core.db import get_db_connection
+from app.core.exceptions import KeyStorageError
+from app.core.init_db import init_db
+from app.core.keys import KEY_COLUMNS, convert_keys
+from app.core.sharding import shard_schemas
+from app.crud import categories as crud_categories
+from app.crud import items as crud_items
+from app.crud import statuses as crud_statuses
+from app.crud import users as crud_users
+from app.schemas.categories import CreateCategory
+from app.schemas.items import CreateItem
+from app.schemas.statuses import CreateStatus
+from app.schemas.users import CreateUser
+
+
+def key_types(connection) -> set[str]:
+    types = set()
+    tables = [('main', table) for table in KEY_COLUMNS]
+    tables += [(schema, 'Items') for schema in shard_schemas() if schema != 'main']
+    for schema, table in tables:
+        for column in KEY_COLUMNS[table]:
+            types.update(
+                row[0]
+                for row in connection.execute(
+                    f'SELECT DISTINCT typeof({column}) FROM {schema}.{table}'
+                    f' WHERE {column} IS NOT NULL'
+                )
+            )
+    return types
+
+
+def counters(connection) -> list[tuple]:
+    # Change counters behind ETags move on with the rewrite, row counts must not
+    rows = []
+    for schema in dict.fromkeys(['main', *shard_schemas()]):
+        rows += [
+            (schema, *row)
+            for row in connection.execute(
+                f'SELECT name, scope, typeof(scope), value FROM {schema}.Counters'
+                " WHERE name NOT LIKE '%version' ORDER BY name, scope"
+            )
+        ]
+    return rows
+
+
+@pytest.fixture(params=[0, 2], ids=['unsharded', 'two_shards'])
+def text_keys(request, database, monkeypatch):
+    """A database filled while keys are stored as text."""
+    monkeypatch.setattr(settings, 'DB_SHARDS', request.param)
+    init_db()
+    connection = get_db_connection()
+    try:
+        category = crud_categories.create_category(
+            CreateCategory(title='Home'), connection
+        )
+        status = crud_statuses.create_status(CreateStatus(title='Open'), connection)
+        owners = []
+        for n in range(3):
+            user = crud_users.create_user(
+                CreateUser(
+                    email=f'owner{n}@example.com',
+                    first_name='Owner',
+                    last_name='Number',
+                    password='unused',
+                ),
+                connection,
+                hashed_password='unused',
+            )
+            owners.append(str(user.user_id))
+        items = {}
+        for n in range(12):
+            item = crud_items.create_item(
+                owners[n % 3],
+                CreateItem(
+                    title=f'item {n}',
+                    category_id=category.category_id if n % 2 else None,
+                    status_id=status.status_id if n % 3 else None,
+                ),
+                connection,
+            )
+            items[str(item.item_id)] = (owners[n % 3], item)
+        before = counters(connection)
+        assert key_types(connection) == {'text'}
+    finally:
+        connection.close()
+    return items, before
+
+
+def test_convert_to_blob_keys_round_trip(text_keys, monkeypatch):
+    items, before = text_keys
+    monkeypatch.setattr(settings, 'DB_UUID_BLOB_KEYS', True)
+    connection = get_db_connection()
+    try:
+        # Users include the admin created at startup
+        expected = 4 + 1 + 1 + len(items)
+        assert convert_keys(connection, shard_schemas()) == expected
+
+        assert key_types(connection) == {'blob'}
+        for schema in dict.fromkeys(['main', *shard_schemas()]):
+            assert (
+                connection.execute(f'PRAGMA {schema}.foreign_key_check').fetchall()
+                == []
+            )
+        # Counter scopes stay text and no count changes
+        assert counters(connection) == before
+
+        for item_id, (owner, item) in items.items():
+            found = crud_items.get_item_by_id(item_id, connection, user_id=owner)
+            assert found == item
+        for owner in {owner for owner, _ in items.values()}:
+            page, _ = crud_items.get_items(connection, 100, user_id=owner)
+            assert {str(row['item_id']) for row in page} == {
+                item_id for item_id, (other, _) in items.items() if other == owner
+            }
+
+        # A second run finds nothing left to do
+        assert convert_keys(connection, shard_schemas()) == 0
+    finally:
+        connection.close()
+
+
+def test_converting_back_to_text_keys_is_refused(text_keys, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_UUID_BLOB_KEYS', True)
+    connection = get_db_connection()
+    try:
+        convert_keys(connection, shard_schemas())
+    finally:
+        connection.close()
+
+    monkeypatch.setattr(settings, 'DB_UUID_BLOB_KEYS', False)
+    with pytest.raises(KeyStorageError, match='not supported'):
+        init_db()
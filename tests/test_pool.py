@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import db
+from app.core.db import ConnectionPool
+from app.core.exceptions import PoolTimeoutError
+from app.main import app
+
+
+class Factory:
+    """Opens in-memory connections and remembers them."""
+
+    def __init__(self):
+        self.created: list[sqlite3.Connection] = []
+
+    def __call__(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.created.append(connection)
+        return connection
+
+
+@pytest.fixture
+def factory():
+    factory = Factory()
+    yield factory
+    for connection in factory.created:
+        connection.close()
+
+
+def test_exhausted_pool_times_out(factory):
+    pool = ConnectionPool(factory, size=2, timeout=0.1)
+    held = [pool.acquire(), pool.acquire()]
+
+    started = time.perf_counter()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.perf_counter() - started >= 0.1
+    assert pool.stats()['in_use'] == 2
+    assert len(factory.created) == 2
+
+    # A released connection is reused rather than a new one opened
+    pool.release(held.pop())
+    assert pool.acquire() in factory.created
+    assert len(factory.created) == 2
+
+
+def test_waiter_gets_a_released_connection(factory):
+    pool = ConnectionPool(factory, size=1, timeout=5)
+    connection = pool.acquire()
+    threading.Timer(0.05, pool.release, (connection,)).start()
+
+    assert pool.acquire() is connection
+    assert pool.stats()['waits'] == 1
+
+
+def test_pool_timeout_is_503(factory, monkeypatch):
+    pool = ConnectionPool(factory, size=1, timeout=0.05)
+    monkeypatch.setattr(db, 'pool', pool)
+    pool.acquire()
+
+    # Without the context manager no startup runs, the route only needs a session
+    response = TestClient(app).post(
+        '/api/v1/auth/signin', json={'email': 'a@example.com', 'password': 'pw'}
+    )
+
+    assert response.status_code == 503
+    assert 'No database connection available' in response.json()['detail']
+
+
+def test_pre_ping_replaces_a_broken_connection(factory):
+    pool = ConnectionPool(factory, size=1, timeout=0.1, pre_ping=True)
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.close()
+
+    connection = pool.acquire()
+
+    assert connection is not broken
+    assert connection.execute('SELECT 1').fetchone() == (1,)
+    assert pool.stats()['discarded'] == 1
+    assert pool.stats()['created'] == 1
+
+
+def test_async_waiter_timing_out_passes_its_wake_up_on(factory):
+    pool = ConnectionPool(factory, size=1, timeout=0.1)
+    connection = pool.acquire()
+
+    def release_as_first_waiter_gives_up():
+        # Hold the lock past the first waiter's deadline, so its timeout runs
+        # and then blocks before it can unregister; the release picks it anyway
+        with pool._lock:
+            time.sleep(0.3)
+            pool.release(connection)
+
+    async def main():
+        first = asyncio.create_task(pool.acquire_async())
+        await asyncio.sleep(0.02)
+        # The second waiter has a longer deadline
+        pool._timeout = 5
+        second = asyncio.create_task(pool.acquire_async())
+        await asyncio.sleep(0.02)
+        threading.Thread(target=release_as_first_waiter_gives_up).start()
+
+        with pytest.raises(PoolTimeoutError):
+            await first
+        return await asyncio.wait_for(second, 1)
+
+    assert asyncio.run(main()) is connection
+    assert pool.stats()['in_use'] == 1
@@ -0,0 +1,105 @@
+import pytest
+
+from app.core.config import settings
+from app.core.db import get_db_connection
+from app.core.exceptions import InvalidCursorError
+from app.core.init_db import init_db
+from app.core.maintenance import vacuum
+from app.core.pagination import encode_cursor
+from app.core.sharding import shard_schemas
+from app.crud import items as crud_items
+from app.crud import users as crud_users
+from app.schemas.items import CreateItem
+from app.schemas.users import CreateUser
+
+
+def add_owners(connection, count: int) -> list[str]:
+    owners = []
+    for n in range(count):
+        user = crud_users.create_user(
+            CreateUser(
+                email=f'owner{n}@example.com',
+                first_name='Owner',
+                last_name='Number',
+                password='unused',
+            ),
+            connection,
+            hashed_password='unused',
+        )
+        owners.append(str(user.user_id))
+    return owners
+
+
+def add_items(connection, owners: list[str]) -> list[str]:
+    # Many items share a title, so many scores tie
+    item_ids = []
+    for n in range(30):
+        title = 'apple pie' if n % 3 else f'apple {n} apple crumble'
+        item = crud_items.create_item(
+            owners[n % len(owners)], CreateItem(title=title), connection
+        )
+        item_ids.append(str(item.item_id))
+    crud_items.create_item(owners[0], CreateItem(title='pear'), connection)
+    return item_ids
+
+
+def search_all(connection, limit: int, user_id=None) -> list[dict]:
+    found, cursor = [], None
+    while True:
+        page, cursor = crud_items.search_items(
+            connection, 'apple', limit, cursor=cursor, user_id=user_id
+        )
+        assert len(page) <= limit
+        found.extend(page)
+        if cursor is None:
+            return found
+
+
+@pytest.fixture(params=[0, 2], ids=['unsharded', 'two_shards'])
+def connection(request, database, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_SHARDS', request.param)
+    init_db()
+    connection = get_db_connection()
+    yield connection
+    connection.close()
+
+
+def test_search_pages_have_no_duplicates_or_gaps(connection):
+    owners = add_owners(connection, 3)
+    item_ids = add_items(connection, owners)
+
+    for limit in (1, 4, 7, 100):
+        found = [str(item['item_id']) for item in search_all(connection, limit)]
+        assert sorted(found) == sorted(item_ids)
+
+    # Each page continues the ranking of the previous one
+    ranked = [str(item['item_id']) for item in search_all(connection, 100)]
+    assert [str(item['item_id']) for item in search_all(connection, 4)] == ranked
+
+    owned = [str(item['item_id']) for item in search_all(connection, 3, owners[1])]
+    assert sorted(owned) == sorted(item_ids[1::3])
+
+
+@pytest.mark.parametrize(
+    'cursor', ['not a cursor', encode_cursor(['first', 'x']), encode_cursor([1.5])]
+)
+def test_search_rejects_an_invalid_cursor(connection, cursor):
+    with pytest.raises(InvalidCursorError):
+        crud_items.search_items(connection, 'apple', 10, cursor=cursor)
+
+
+def test_vacuum_keeps_search_in_step(connection):
+    owners = add_owners(connection, 2)
+    item_ids = add_items(connection, owners)
+    # Deleted rows leave rowid gaps that VACUUM may close
+    for item_id in item_ids[:10]:
+        crud_items.delete_item(item_id, connection)
+
+    vacuum(connection)
+
+    found = [str(item['item_id']) for item in search_all(connection, 7)]
+    assert sorted(found) == sorted(item_ids[10:])
+    for schema in shard_schemas():
+        connection.execute(
+            f"INSERT INTO {schema}.ItemsFts (ItemsFts) VALUES ('integrity-check')"
+        )
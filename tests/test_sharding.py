@@ -0,0 +1,73 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.core.db import get_db_connection
+from app.core.init_db import init_db
+from app.core.sharding import move_items_to_shards, shard_for
+from app.crud import items as crud_items
+from app.crud import users as crud_users
+from app.schemas.items import CreateItem
+from app.schemas.users import CreateUser
+
+
+def add_user(connection, email: str) -> str:
+    user = crud_users.create_user(
+        CreateUser(email=email, first_name='Owner', last_name='Number', password='x'),
+        connection,
+        hashed_password='unused',
+    )
+    return str(user.user_id)
+
+
+def count(connection, query: str) -> int:
+    return connection.execute(query).fetchone()[0]
+
+
+@pytest.mark.parametrize('shards', [0, 1, 10])
+def test_db_shards_in_range(shards):
+    assert Settings(DB_SHARDS=shards).DB_SHARDS == shards
+
+
+@pytest.mark.parametrize('shards', [-1, 11])
+def test_db_shards_out_of_range(shards):
+    with pytest.raises(ValidationError, match='DB_SHARDS must be between 0 and 10'):
+        Settings(DB_SHARDS=shards)
+
+
+def test_interrupted_move_is_finished_on_the_next_start(connection, monkeypatch):
+    user_id = add_user(connection, 'owner@example.com')
+    for n in range(5):
+        crud_items.create_item(user_id, CreateItem(title=f'item {n}'), connection)
+
+    monkeypatch.setattr(settings, 'DB_SHARDS', 2)
+    init_db()
+    moved = get_db_connection()
+    try:
+        schema = shard_for(user_id)
+        # A crash after the copies were committed leaves the items in both files
+        moved.execute(f'INSERT INTO main.Items SELECT * FROM {schema}.Items')
+        moved.commit()
+
+        assert move_items_to_shards(moved) == 5
+        assert count(moved, 'SELECT count(*) FROM main.Items') == 0
+        assert count(moved, f'SELECT count(*) FROM {schema}.Items') == 5
+    finally:
+        moved.close()
+
+
+def test_delete_user_removes_their_shard_items(database, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_SHARDS', 2)
+    init_db()
+    connection = get_db_connection()
+    try:
+        user_id = add_user(connection, 'owner@example.com')
+        crud_items.create_item(user_id, CreateItem(title='item'), connection)
+        schema = shard_for(user_id)
+
+        assert crud_users.delete_user(user_id, connection)
+
+        assert crud_users.get_user_by_id(user_id, connection) is None
+        assert count(connection, f'SELECT count(*) FROM {schema}.Items') == 0
+    finally:
+        connection.close()
@@ -0,0 +1,39 @@
+from app.core.tracing import find_full_scans, registered_queries
+
+
+def test_built_item_queries_are_registered():
+    names = registered_queries()
+    assert 'items.get_items_by_ids_query' in names
+    for name in (
+        'items.get_items[admin,all,-updated_at]',
+        'items.get_items[user,status_id,created_at]',
+        'items.get_items[user,next_page,-created_at]',
+        'items.count_items[admin,category_id]',
+    ):
+        assert name in names
+
+
+def test_no_query_scans_a_whole_table(connection):
+    assert find_full_scans(connection) == {}
+
+
+def test_missing_index_of_a_built_query_is_reported(connection):
+    connection.execute('DROP INDEX ix_items_updated_at')
+    connection.execute('DROP INDEX ix_items_user_updated_at')
+
+    full_scans = find_full_scans(connection)
+
+    assert 'items.get_items[admin,all,updated_at]' in full_scans
+    assert 'items.count_items[admin,updated_at]' in full_scans
+
+
+def test_revoked_token_queries_use_their_index(connection):
+    names = registered_queries()
+    assert 'tokens.get_revoked_tokens_query' in names
+    assert 'tokens.prune_revoked_tokens_query' in names
+
+    connection.execute('DROP INDEX ix_revoked_tokens_expires_at')
+
+    full_scans = find_full_scans(connection)
+    assert 'tokens.get_revoked_tokens_query' in full_scans
+    assert 'tokens.prune_revoked_tokens_query' in full_scans
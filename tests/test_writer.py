@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+from uuid import uuid4
+
+import pytest
+
+from app.core.db import get_db_connection
+from app.core.writer import DatabaseWriter, after_commit
+
+insert_status_query = 'INSERT INTO Statuses (status_id, title) VALUES (?, ?)'
+
+
+def add_status(title: str, connection: sqlite3.Connection) -> str:
+    with connection:
+        connection.execute(insert_status_query, (str(uuid4()), title))
+    return title
+
+
+def add_status_then_fail(
+    title: str, callbacks: list, connection: sqlite3.Connection
+) -> None:
+    with connection:
+        connection.execute(insert_status_query, (str(uuid4()), title))
+    after_commit(connection, lambda: callbacks.append(title))
+    raise ValueError('job failed')
+
+
+def committed_titles() -> set[str]:
+    connection = get_db_connection()
+    try:
+        return {row[0] for row in connection.execute('SELECT title FROM Statuses')}
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def writer(database):
+    # A long window so that jobs submitted together share one batch
+    writer = DatabaseWriter(commit_window=0.2, max_batch=64)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def test_failing_job_rolls_back_only_its_savepoint(writer):
+    callbacks = []
+    futures = [
+        writer.submit(add_status, 'first'),
+        writer.submit(add_status_then_fail, 'failed', callbacks),
+        writer.submit(add_status, 'last'),
+    ]
+
+    assert futures[0].result(timeout=5) == 'first'
+    with pytest.raises(ValueError, match='job failed'):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == 'last'
+
+    assert committed_titles() == {'first', 'last'}
+    # The batch committed, but the failed job's callback went with its writes
+    assert callbacks == []
+    stats = writer.stats()
+    assert stats['batches'] == 1
+    assert stats['jobs'] == 3
+    assert stats['failed_jobs'] == 1
+
+
+def test_after_commit_callbacks_run_once_committed(writer):
+    job_done = threading.Event()
+    seen = []
+
+    def callback():
+        # Another connection only sees the row once it is committed
+        seen.append(('callback', job_done.is_set(), 'pending' in committed_titles()))
+
+    def job(connection: sqlite3.Connection) -> None:
+        add_status('pending', connection)
+        after_commit(connection, callback)
+        seen.append(('job', 'pending' in committed_titles()))
+        job_done.set()
+
+    writer.submit(job).result(timeout=5)
+
+    assert seen == [('job', False), ('callback', True, True)]
+
+
+def test_after_commit_runs_at_once_outside_the_writer(connection):
+    calls = []
+    add_status('direct', connection)
+    after_commit(connection, lambda: calls.append('direct' in committed_titles()))
+    assert calls == [True]
+
+
+def test_stop_finishes_queued_jobs_and_closes(database):
+    writer = DatabaseWriter(commit_window=0.05, max_batch=4)
+    writer.start()
+    futures = [writer.submit(add_status, f'status {n}') for n in range(10)]
+
+    writer.stop()
+
+    assert not writer.running
+    assert [future.result(timeout=0) for future in futures] == [
+        f'status {n}' for n in range(10)
+    ]
+    assert committed_titles() == {f'status {n}' for n in range(10)}
+    # Stopping twice is harmless, and the writer can be started again
+    writer.stop()
+    writer.start()
+    assert writer.submit(add_status, 'again').result(timeout=5) == 'again'
+    writer.stop()